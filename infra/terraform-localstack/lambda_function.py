@@ -1,6 +1,15 @@
 import json
 import os
 import boto3
+from botocore.config import Config
+
+# Initialize AWS clients (pointing to LocalStack) once per container so warm
+# invocations reuse them and their connection pools
+LOCALSTACK_ENDPOINT = 'http://localstack:4566'
+CLIENT_CONFIG = Config(max_pool_connections=50, retries={'max_attempts': 2})
+
+s3 = boto3.client('s3', endpoint_url=LOCALSTACK_ENDPOINT, config=CLIENT_CONFIG)
+dynamodb = boto3.client('dynamodb', endpoint_url=LOCALSTACK_ENDPOINT, config=CLIENT_CONFIG)
 
 def handler(event, context):
     """
@@ -14,10 +23,6 @@ def handler(event, context):
     vector_table = os.environ.get('VECTOR_TABLE')
     opensearch_domain = os.environ.get('OPENSEARCH_DOMAIN')
     
-    # Initialize AWS clients (pointing to LocalStack)
-    s3 = boto3.client('s3', endpoint_url='http://localstack:4566')
-    dynamodb = boto3.client('dynamodb', endpoint_url='http://localstack:4566')
-    
     # Process the event
     if event.get('action') == 'process_document':
         document_key = event.get('document_key')
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """Check which AWS environment is currently active."""
 
+import argparse
 import os
 import boto3
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
-def check_environment():
+def check_environment(list_buckets=False):
     """Check and display the current AWS environment configuration."""
     print("Current AWS Environment Configuration")
     print("=" * 40)
@@ -50,14 +52,29 @@ def check_environment():
             # Real AWS
             s3 = boto3.client('s3', region_name=region)
         
-        buckets = s3.list_buckets()
-        print(f"✅ Connected! Found {len(buckets['Buckets'])} S3 buckets")
+        # A single HEAD request proves connectivity without listing every bucket
+        bucket = os.environ.get('DOCUMENTS_BUCKET', 'test-bucket')
+        try:
+            s3.head_bucket(Bucket=bucket)
+            print(f"✅ Connected! Bucket '{bucket}' is reachable")
+        except ClientError as e:
+            # The endpoint answered; a 404 still proves the credentials were accepted
+            code = e.response.get('Error', {}).get('Code', 'Unknown')
+            if code in ('404', 'NoSuchBucket'):
+                print(f"✅ Connected! Bucket '{bucket}' does not exist yet")
+            else:
+                print(f"⚠️  Reached S3, but bucket '{bucket}' returned {code}")
+                print("   Hint: Check your AWS credentials or set DOCUMENTS_BUCKET")
         
-        # List first 3 buckets
-        for i, bucket in enumerate(buckets['Buckets'][:3]):
-            print(f"   - {bucket['Name']}")
-        if len(buckets['Buckets']) > 3:
-            print(f"   ... and {len(buckets['Buckets']) - 3} more")
+        if list_buckets:
+            buckets = s3.list_buckets()
+            print(f"   Found {len(buckets['Buckets'])} S3 buckets")
+            
+            # List first 3 buckets
+            for i, bucket in enumerate(buckets['Buckets'][:3]):
+                print(f"   - {bucket['Name']}")
+            if len(buckets['Buckets']) > 3:
+                print(f"   ... and {len(buckets['Buckets']) - 3} more")
             
     except Exception as e:
         print(f"❌ Connection failed: {str(e)[:100]}")
@@ -67,4 +84,8 @@ def check_environment():
             print("   Hint: Is LocalStack running? Try: make localstack-up")
 
 if __name__ == "__main__":
-    check_environment()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--list-buckets', action='store_true',
+                        help='Also list S3 buckets (slow on accounts with many buckets)')
+    args = parser.parse_args()
+    check_environment(list_buckets=args.list_buckets)
\ No newline at end of file
@@ -2,14 +2,26 @@
 
 
 import numpy as np
+import torch
 from sentence_transformers import CrossEncoder
 
 
 class CrossEncoderReranker:
     """Rerank documents using a cross-encoder model."""
 
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
-        self.model = CrossEncoder(model_name)
+    def __init__(self,
+                 model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 device: str | None = None,
+                 batch_size: int = 64):
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = device
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, device=device)
+
+        # Half precision roughly doubles GPU throughput with no ranking change in practice
+        if device.startswith("cuda"):
+            self.model.model.half()
 
     def rerank(self,
                query: str,
@@ -20,21 +32,28 @@ class CrossEncoderReranker:
         
         Returns list of (index, score, document) tuples.
         """
+        if not documents:
+            return []
+
         # Create query-document pairs
         pairs = [[query, doc] for doc in documents]
 
-        # Get reranking scores
-        scores = self.model.predict(pairs)
+        # Get reranking scores in large batches
+        scores = self.model.predict(pairs,
+                                    batch_size=self.batch_size,
+                                    show_progress_bar=False,
+                                    convert_to_numpy=True)
 
-        # Sort by score (descending)
-        sorted_indices = np.argsort(scores)[::-1]
+        # Sort by score (descending); for a small top_k only the winners are sorted
+        if top_k and top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k)[:top_k]
+            sorted_indices = candidates[np.argsort(-scores[candidates])]
+        else:
+            sorted_indices = np.argsort(scores)[::-1]
 
         # Return top-k results
         results = []
-        limit = top_k if top_k else len(documents)
-
-        for i in range(min(limit, len(documents))):
-            idx = sorted_indices[i]
+        for idx in sorted_indices:
             results.append((idx, float(scores[idx]), documents[idx]))
 
         return results
@@ -5,20 +5,95 @@ This module provides functionality to convert natural language queries
 into SQL statements using AWS Bedrock and PostgreSQL database introspection.
 """
 
+import hashlib
 import json
 import logging
+import os
 import re
-from dataclasses import dataclass
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
 from typing import Any
 
 import boto3
 import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.dialects.postgres import Postgres
+    from sqlglot.errors import SqlglotError
+except ImportError:
+    sqlglot = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PostgreSQL type OIDs for date, time, timestamp, timestamptz and timetz
+DATETIME_TYPE_CODES = frozenset({1082, 1083, 1114, 1184, 1266})
+
+# Fixed NL2SQL instructions; only the schema is substituted, once per schema
+SQL_SYSTEM_PROMPT = """You are a SQL expert. Convert the user's natural language query to a PostgreSQL SELECT statement.
+
+Database Schema:
+{schema}
+
+Important Guidelines:
+1. Only generate SELECT statements
+2. Use proper table aliases
+3. Join tables when needed using foreign key relationships
+4. Use appropriate WHERE clauses
+5. Format the output nicely with proper indentation
+6. Don't include any explanations, just return the SQL query
+7. Ensure the query is PostgreSQL compatible"""
+
+
+if sqlglot is not None:
+    # Statement roots that only read data
+    _READ_ONLY_ROOTS = (exp.Select, exp.Union, exp.Intersect, exp.Except)
+    # Nodes that must not appear anywhere in a read-only query; resolved by name
+    # because sqlglot renames some of them across releases
+    _FORBIDDEN_NODES = tuple(
+        getattr(exp, name)
+        for name in ("Delete", "Update", "Insert", "Merge", "Drop", "Create", "Alter",
+                     "AlterTable", "TruncateTable", "Grant", "Command")
+        if hasattr(exp, name)
+    )
+
+
+def _check_sql_ast(query: str) -> str | None:
+    """Parse a query with sqlglot and return why it is not a single read-only SELECT."""
+    try:
+        statements = [s for s in sqlglot.parse(query, read="postgres") if s is not None]
+    except SqlglotError:
+        return "Query could not be parsed"
+
+    if len(statements) != 1:
+        return "Only a single statement is allowed"
+    if not isinstance(statements[0], _READ_ONLY_ROOTS):
+        return "Only SELECT queries are allowed"
+
+    node = statements[0].find(*_FORBIDDEN_NODES)
+    if node is not None:
+        return f"Query contains a forbidden {type(node).__name__} statement"
+    return None
+
 
 @dataclass
 class TableInfo:
@@ -41,18 +116,171 @@ class QueryResult:
     execution_time: float | None = None
 
 
-class DatabaseIntrospector:
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """Thread-safe pool whose getconn waits for a free connection.
+
+    ThreadedConnectionPool raises PoolError once maxconn connections are out, so more
+    concurrent callers than connections would fail instead of queueing.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        self._slots.acquire()
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+# Process-wide psycopg2 pools keyed by connection parameters, so the introspector,
+# the agent and any further agents for the same database share connections
+_POOLS: dict[tuple, BlockingConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool_key(params: dict[str, Any]) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in params.items()))
+
+
+def _get_pool(
+    params: dict[str, Any], minconn: int = 1, maxconn: int = 8
+) -> BlockingConnectionPool:
+    """Return the shared pool for these connection parameters, creating it once."""
+    key = _pool_key(params)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = _POOLS[key] = BlockingConnectionPool(minconn, maxconn, **params)
+    return pool
+
+
+def _close_pool(params: dict[str, Any]) -> None:
+    """Close and forget the shared pool for these connection parameters, if any."""
+    with _POOLS_LOCK:
+        pool = _POOLS.pop(_pool_key(params), None)
+    if pool is not None:
+        pool.closeall()
+
+
+class PooledConnectionMixin(ABC):
+    """Hands out connections from the shared psycopg2 pool for its database."""
+
+    POOL_MIN_CONNECTIONS = 1
+    POOL_MAX_CONNECTIONS = 8
+
+    @abstractmethod
+    def _connection_params(self) -> dict[str, str]:
+        """Connection parameters identifying this object's database."""
+
+    @contextmanager
+    def _get_conn(self) -> Iterator[Any]:
+        """Borrow a pooled connection for one transaction."""
+        pool = _get_pool(
+            self._connection_params(), self.POOL_MIN_CONNECTIONS, self.POOL_MAX_CONNECTIONS
+        )
+        conn = pool.getconn()
+        try:
+            # The connection context commits or rolls back but leaves it open
+            with conn as transaction:
+                yield transaction
+        finally:
+            pool.putconn(conn)
+
+    def close(self) -> None:
+        """Close every pooled connection to this database (shared with other users)."""
+        _close_pool(self._connection_params())
+
+
+class DatabaseIntrospector(PooledConnectionMixin):
     """Extracts schema information from PostgreSQL database."""
 
-    def __init__(self, connection_params: dict[str, str]):
+    def __init__(
+        self,
+        connection_params: dict[str, str],
+        cache_dir: str | None = None,
+        cache_ttl: float = 3600,
+    ):
         self.connection_params = connection_params
 
-    def get_schema_info(self, schema_name: str = "workshop") -> dict[str, TableInfo]:
-        """Extract complete schema information."""
+        # Optional on-disk schema cache shared across processes, e.g.
+        # "~/.cache/aws-rag"; entries older than cache_ttl seconds are re-read
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self.cache_ttl = cache_ttl
+
+    def _connection_params(self) -> dict[str, str]:
+        return self.connection_params
+
+    def _cache_path(self, schema_name: str) -> Path:
+        """Cache file for a schema of this database; the password is not part of the key."""
+        key = "|".join(
+            str(self.connection_params.get(field, ""))
+            for field in ("host", "port", "database", "user")
+        )
+        digest = hashlib.blake2b(f"{key}|{schema_name}".encode(), digest_size=8).hexdigest()
+        return self.cache_dir / f"schema-{digest}.json"
+
+    @staticmethod
+    def _dump_schema(schema_info: dict[str, TableInfo]) -> bytes:
+        """Serialize schema info to JSON, using orjson's native dataclass support if installed."""
+        if orjson is not None:
+            return orjson.dumps(schema_info)
+        return json.dumps({name: asdict(info) for name, info in schema_info.items()}).encode()
+
+    @staticmethod
+    def _load_schema(payload: bytes) -> dict[str, TableInfo]:
+        """Rebuild schema info from the JSON written by _dump_schema."""
+        data = orjson.loads(payload) if orjson is not None else json.loads(payload)
+        return {name: TableInfo(**info) for name, info in data.items()}
+
+    def get_schema_info(
+        self, schema_name: str = "workshop", refresh: bool = False
+    ) -> dict[str, TableInfo]:
+        """Extract complete schema information.
+
+        With a cache_dir, a fresh cached copy is returned without querying the
+        database unless refresh is set.
+        """
+        if self.cache_dir is None:
+            return self._introspect(schema_name)
+
+        cache_path = self._cache_path(schema_name)
+        if not refresh:
+            try:
+                if time.time() - cache_path.stat().st_mtime < self.cache_ttl:
+                    return self._load_schema(cache_path.read_bytes())
+            except (OSError, ValueError, TypeError):
+                # Missing, stale-format or corrupt cache: fall through and re-read
+                pass
+
+        schema_info = self._introspect(schema_name)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            partial_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            partial_path.write_bytes(self._dump_schema(schema_info))
+            partial_path.replace(cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write schema cache: {e}")
+        return schema_info
+
+    def _introspect(self, schema_name: str) -> dict[str, TableInfo]:
+        """Read the schema from the database."""
         schema_info = {}
 
         try:
-            with psycopg2.connect(**self.connection_params) as conn:
+            with self._get_conn() as conn:
                 with conn.cursor() as cursor:
                     # Get all tables in the schema
                     cursor.execute(
@@ -67,8 +295,16 @@ class DatabaseIntrospector:
 
                     tables = [row[0] for row in cursor.fetchall()]
 
+                    # Columns and foreign keys for the whole schema, one query each
+                    columns = self._get_columns_by_table(cursor, schema_name)
+                    foreign_keys = self._get_foreign_keys_by_table(cursor, schema_name)
+
                     for table in tables:
-                        schema_info[table] = self._get_table_info(cursor, schema_name, table)
+                        schema_info[table] = TableInfo(
+                            name=table,
+                            columns=columns.get(table, []),
+                            foreign_keys=foreign_keys.get(table, []),
+                        )
 
         except Exception as e:
             logger.error(f"Error extracting schema info: {e}")
@@ -76,39 +312,47 @@ class DatabaseIntrospector:
 
         return schema_info
 
-    def _get_table_info(self, cursor, schema_name: str, table_name: str) -> TableInfo:
-        """Get detailed information about a specific table."""
-        # Get column information
+    def _get_columns_by_table(self, cursor, schema_name: str) -> dict[str, list[dict[str, Any]]]:
+        """Get column information for every table in the schema, grouped by table."""
         cursor.execute(
             """
             SELECT
+                table_name,
                 column_name,
                 data_type,
                 is_nullable,
                 column_default,
                 character_maximum_length
             FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = %s
-            ORDER BY ordinal_position
+            WHERE table_schema = %s
+            ORDER BY table_name, ordinal_position
         """,
-            (schema_name, table_name),
+            (schema_name,),
         )
 
-        columns = []
-        for row in cursor.fetchall():
-            col_info = {
-                "name": row[0],
-                "type": row[1],
-                "nullable": row[2] == "YES",
-                "default": row[3],
-                "max_length": row[4],
-            }
-            columns.append(col_info)
-
-        # Get foreign key relationships
+        columns_by_table = {}
+        for table_name, rows in groupby(cursor.fetchall(), key=itemgetter(0)):
+            columns_by_table[table_name] = [
+                {
+                    "name": row[1],
+                    "type": row[2],
+                    "nullable": row[3] == "YES",
+                    "default": row[4],
+                    "max_length": row[5],
+                }
+                for row in rows
+            ]
+
+        return columns_by_table
+
+    def _get_foreign_keys_by_table(
+        self, cursor, schema_name: str
+    ) -> dict[str, list[dict[str, str]]]:
+        """Get foreign key relationships for every table in the schema, grouped by table."""
         cursor.execute(
             """
             SELECT
+                tc.table_name,
                 kcu.column_name,
                 ccu.table_name AS foreign_table_name,
                 ccu.column_name AS foreign_column_name
@@ -121,17 +365,19 @@ class DatabaseIntrospector:
                 AND ccu.table_schema = tc.table_schema
             WHERE tc.constraint_type = 'FOREIGN KEY'
                 AND tc.table_schema = %s
-                AND tc.table_name = %s
+            ORDER BY tc.table_name
         """,
-            (schema_name, table_name),
+            (schema_name,),
         )
 
-        foreign_keys = []
-        for row in cursor.fetchall():
-            fk_info = {"column": row[0], "references_table": row[1], "references_column": row[2]}
-            foreign_keys.append(fk_info)
+        foreign_keys_by_table = {}
+        for table_name, rows in groupby(cursor.fetchall(), key=itemgetter(0)):
+            foreign_keys_by_table[table_name] = [
+                {"column": row[1], "references_table": row[2], "references_column": row[3]}
+                for row in rows
+            ]
 
-        return TableInfo(name=table_name, columns=columns, foreign_keys=foreign_keys)
+        return foreign_keys_by_table
 
 
 class SQLSecurityValidator:
@@ -148,11 +394,56 @@ class SQLSecurityValidator:
         r"\bUPDATE\b(?!\s+.*\bWHERE\b)",  # UPDATE without WHERE
         r"\bGRANT\b",
         r"\bREVOKE\b",
-        r";.*?;",  # Multiple statements
+        r";\s*\S",  # Multiple statements: anything after a semicolon
         r"--",  # SQL comments
         r"/\*.*?\*/",  # Block comments
+        r"'[^']*'\s*=\s*'[^']*'",  # String tautology such as '1'='1'
     ]
 
+    # All patterns fused into one alternation so the query is scanned once; the
+    # group name p<i> maps a match back to DANGEROUS_PATTERNS[i]
+    DANGEROUS_REGEX = re.compile(
+        "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(DANGEROUS_PATTERNS)),
+        re.IGNORECASE,
+    )
+
+    # Control characters other than tab, newline and carriage return; a query
+    # containing any of them (NUL, backspace, escape, DEL, ...) is rejected
+    CONTROL_CHARS = dict.fromkeys([*range(0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+
+    # Words a fast-path identifier must not be: every keyword DANGEROUS_PATTERNS
+    # looks for, plus PostgreSQL's reserved and type/function-only key words (which
+    # cannot be bare identifiers and would change how the query parses)
+    TRIVIAL_SELECT_EXCLUDED_WORDS = frozenset(
+        (
+            "DROP DELETE TRUNCATE ALTER CREATE INSERT UPDATE GRANT REVOKE "
+            "ALL ANALYSE ANALYZE AND ANY ARRAY AS ASC ASYMMETRIC BOTH CASE CAST CHECK COLLATE "
+            "COLUMN CONSTRAINT CURRENT_CATALOG CURRENT_DATE CURRENT_ROLE CURRENT_TIME "
+            "CURRENT_TIMESTAMP CURRENT_USER DEFAULT DEFERRABLE DESC DISTINCT DO ELSE END "
+            "EXCEPT FALSE FETCH FOR FOREIGN FROM GROUP HAVING IN INITIALLY INTERSECT INTO "
+            "LATERAL LEADING LIMIT LOCALTIME LOCALTIMESTAMP NOT NULL OFFSET ON ONLY OR ORDER "
+            "PLACING PRIMARY REFERENCES RETURNING SELECT SESSION_USER SOME SYMMETRIC TABLE "
+            "THEN TO TRAILING TRUE UNION UNIQUE USER USING VARIADIC WHEN WHERE WINDOW WITH "
+            "AUTHORIZATION BINARY COLLATION CONCURRENTLY CROSS CURRENT_SCHEMA FREEZE FULL "
+            "ILIKE INNER IS ISNULL JOIN LEFT LIKE NATURAL NOTNULL OUTER OVERLAPS RIGHT "
+            "SIMILAR TABLESAMPLE VERBOSE"
+        ).split()
+    )
+    if sqlglot is not None:
+        # sqlglot tokenizes its own keywords specially, so they may not parse as names
+        TRIVIAL_SELECT_EXCLUDED_WORDS |= {
+            word for word in Postgres.Tokenizer.KEYWORDS if word.isidentifier()
+        }
+
+    # "SELECT <*|COUNT(*)|column list> FROM <table>" with nothing else: no quotes,
+    # comments, subqueries or stacked statements. Once its names are also checked
+    # against TRIVIAL_SELECT_EXCLUDED_WORDS, none of the checks below can fire
+    TRIVIAL_SELECT_REGEX = re.compile(
+        r"\s*SELECT\s+(?:\*|COUNT\(\*\)|(?P<columns>\w+(?:\.\w+)?(?:\s*,\s*\w+(?:\.\w+)?)*))"
+        r"\s+FROM\s+(?P<table>\w+(?:\.\w+)?)\s*;?\s*",
+        re.IGNORECASE,
+    )
+
     def validate_query(self, query: str) -> tuple[bool, str | None]:
         """
         Validate if a SQL query is safe to execute.
@@ -163,16 +454,46 @@ class SQLSecurityValidator:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        query_upper = query.upper().strip()
+        return self._validate(query)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _validate(query: str) -> tuple[bool, str | None]:
+        """Pure core of validate_query, memoized for repeated queries."""
+        # Deleting the control characters in one C-level translate pass and
+        # comparing lengths avoids scanning the query character by character
+        if len(query.translate(SQLSecurityValidator.CONTROL_CHARS)) != len(query):
+            return False, "Query contains control characters"
+
+        # Fast path for the common trivial SELECT: skip the pattern scan and parse
+        trivial = (
+            SQLSecurityValidator.TRIVIAL_SELECT_REGEX.fullmatch(query)
+            if len(query) <= 2000 and query.count("JOIN") <= 5
+            else None
+        )
+        if trivial:
+            names = f"{trivial['columns'] or ''} {trivial['table']}".upper()
+            if SQLSecurityValidator.TRIVIAL_SELECT_EXCLUDED_WORDS.isdisjoint(
+                re.findall(r"\w+", names)
+            ):
+                return True, None
 
         # Check if query starts with SELECT
-        if not query_upper.startswith("SELECT"):
+        if query.lstrip()[:6].upper() != "SELECT":
             return False, "Only SELECT queries are allowed"
 
         # Check for dangerous patterns
-        for pattern in self.DANGEROUS_PATTERNS:
-            if re.search(pattern, query_upper, re.IGNORECASE):
-                return False, f"Query contains potentially dangerous pattern: {pattern}"
+        match = SQLSecurityValidator.DANGEROUS_REGEX.search(query)
+        if match:
+            pattern = SQLSecurityValidator.DANGEROUS_PATTERNS[int(match.lastgroup[1:])]
+            return False, f"Query contains potentially dangerous pattern: {pattern}"
+
+        # With sqlglot installed, also check the parse tree: this catches stacked
+        # or nested write statements that slip past the keyword patterns
+        if sqlglot is not None:
+            error = _check_sql_ast(query)
+            if error:
+                return False, error
 
         # Check for excessive complexity (simple heuristics)
         if query.count("(") > 10 or query.count("JOIN") > 5:
@@ -187,50 +508,57 @@ class SQLSecurityValidator:
 class BedrockNL2SQL:
     """Natural Language to SQL conversion using AWS Bedrock."""
 
-    def __init__(self, region_name: str = "us-east-1", endpoint_url: str | None = None):
+    def __init__(
+        self,
+        region_name: str = "us-east-1",
+        endpoint_url: str | None = None,
+        prompt_caching: bool = False,
+    ):
         self.bedrock = boto3.client(
             "bedrock-runtime", region_name=region_name, endpoint_url=endpoint_url
         )
         self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+        # Mark the schema prefix cacheable; needs a model with prompt caching
+        self.prompt_caching = prompt_caching
+        # System prompt for the most recent schema dict; holding the dict itself
+        # (rather than its id) guarantees the identity check cannot be fooled by reuse
+        self._schema_prompt_source: dict[str, TableInfo] | None = None
+        self._system_prompt: str = ""
 
     def generate_sql(self, natural_query: str, schema_info: dict[str, TableInfo]) -> str:
         """Convert natural language to SQL using Bedrock."""
-        schema_description = self._format_schema_for_prompt(schema_info)
-
-        prompt = f"""You are a SQL expert. Convert the following natural language query to a PostgreSQL SELECT statement.
-
-Database Schema:
-{schema_description}
-
-Natural Language Query: {natural_query}
-
-Important Guidelines:
-1. Only generate SELECT statements
-2. Use proper table aliases
-3. Join tables when needed using foreign key relationships
-4. Use appropriate WHERE clauses
-5. Format the output nicely with proper indentation
-6. Don't include any explanations, just return the SQL query
-7. Ensure the query is PostgreSQL compatible
+        if schema_info is not self._schema_prompt_source:
+            self._system_prompt = SQL_SYSTEM_PROMPT.format(
+                schema=self._format_schema_for_prompt(schema_info)
+            )
+            self._schema_prompt_source = schema_info
 
-SQL Query:"""
+        # The instructions and schema form a fixed system prefix and the question
+        # comes last, so with prompt caching on, Bedrock reuses the cached prefix
+        system = [{"text": self._system_prompt}]
+        if self.prompt_caching:
+            system.append({"cachePoint": {"type": "default"}})
 
         try:
-            response = self.bedrock.invoke_model(
+            response = self.bedrock.converse(
                 modelId=self.model_id,
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps(
+                system=system,
+                messages=[
                     {
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "max_tokens": 1000,
-                        "messages": [{"role": "user", "content": prompt}],
+                        "role": "user",
+                        "content": [
+                            {"text": f"Natural Language Query: {natural_query}\n\nSQL Query:"}
+                        ],
                     }
-                ),
+                ],
+                inferenceConfig={"maxTokens": 1000},
             )
 
-            response_body = json.loads(response["body"].read())
-            sql_query = response_body["content"][0]["text"].strip()
+            sql_query = next(
+                block["text"]
+                for block in response["output"]["message"]["content"]
+                if "text" in block
+            ).strip()
 
             # Clean up the response - remove any markdown formatting
             sql_query = re.sub(r"```sql\s*", "", sql_query)
@@ -245,46 +573,83 @@ SQL Query:"""
 
     def _format_schema_for_prompt(self, schema_info: dict[str, TableInfo]) -> str:
         """Format schema information for the prompt."""
-        schema_text = ""
+        parts = []
 
         for table_name, table_info in schema_info.items():
-            schema_text += f"\nTable: {table_name}\n"
-            schema_text += "Columns:\n"
+            parts.append(f"\nTable: {table_name}\n")
+            parts.append("Columns:\n")
 
             for col in table_info.columns:
                 nullable = "NULL" if col["nullable"] else "NOT NULL"
-                schema_text += f"  - {col['name']} ({col['type']}) {nullable}\n"
+                parts.append(f"  - {col['name']} ({col['type']}) {nullable}\n")
 
             if table_info.foreign_keys:
-                schema_text += "Foreign Keys:\n"
+                parts.append("Foreign Keys:\n")
                 for fk in table_info.foreign_keys:
-                    schema_text += f"  - {fk['column']} -> {fk['references_table']}.{fk['references_column']}\n"
+                    parts.append(
+                        f"  - {fk['column']} -> {fk['references_table']}.{fk['references_column']}\n"
+                    )
 
-            schema_text += "\n"
+            parts.append("\n")
 
-        return schema_text
+        return "".join(parts)
 
 
-class SQLAgent:
+class SQLAgent(PooledConnectionMixin):
     """Main SQL Agent class that orchestrates NL2SQL conversion and execution."""
 
+    # Rows pulled from the server per round trip when reading a result
+    FETCH_BATCH_SIZE = 1000
+
     def __init__(
         self,
         db_connection_params: dict[str, str],
         aws_region: str = "us-east-1",
         aws_endpoint_url: str | None = None,
+        schema_cache_dir: str | None = None,
     ):
         self.db_params = db_connection_params
-        self.introspector = DatabaseIntrospector(db_connection_params)
+        self.introspector = DatabaseIntrospector(db_connection_params, cache_dir=schema_cache_dir)
         self.nl2sql = BedrockNL2SQL(aws_region, aws_endpoint_url)
         self.validator = SQLSecurityValidator()
         self.schema_cache = None
         self.cache_timestamp = None
 
+        # Generated SQL keyed on (question, schema fingerprint), so repeated questions
+        # skip the Bedrock round trip until the schema changes
+        self._schema_fp: str | None = None
+        self._generate_sql_cached = lru_cache(maxsize=1024)(self._generate_sql)
+
+    def _connection_params(self) -> dict[str, str]:
+        return self.db_params
+
+    @staticmethod
+    def _schema_fingerprint(schema_info: dict[str, TableInfo]) -> str:
+        """Digest everything the SQL prompt depends on into a short cache key."""
+        summary = tuple(
+            (
+                table_name,
+                tuple((col["name"], col["type"], col["nullable"]) for col in table_info.columns),
+                tuple(
+                    (fk["column"], fk["references_table"], fk["references_column"])
+                    for fk in table_info.foreign_keys
+                ),
+            )
+            for table_name, table_info in schema_info.items()
+        )
+        # A fixed-size string key hashes in O(1) on every cache lookup, unlike the
+        # nested tuple, whose hash is recomputed over the whole schema each time
+        return hashlib.blake2b(repr(summary).encode(), digest_size=8).hexdigest()
+
+    def _generate_sql(self, natural_language_query: str, schema_fp: str) -> str:
+        """Generate SQL for the current schema; schema_fp only serves as the cache key."""
+        return self.nl2sql.generate_sql(natural_language_query, self.schema_cache)
+
     def refresh_schema(self, schema_name: str = "workshop") -> None:
         """Refresh the cached schema information."""
         logger.info("Refreshing database schema cache...")
-        self.schema_cache = self.introspector.get_schema_info(schema_name)
+        self.schema_cache = self.introspector.get_schema_info(schema_name, refresh=True)
+        self._schema_fp = self._schema_fingerprint(self.schema_cache)
         self.cache_timestamp = datetime.now()
         logger.info(f"Cached schema for {len(self.schema_cache)} tables")
 
@@ -305,10 +670,12 @@ class SQLAgent:
             # Ensure schema cache is available
             if not self.schema_cache:
                 self.refresh_schema(schema_name)
+            elif self._schema_fp is None:
+                self._schema_fp = self._schema_fingerprint(self.schema_cache)
 
             # Generate SQL from natural language
             logger.info(f"Converting to SQL: {natural_language_query}")
-            sql_query = self.nl2sql.generate_sql(natural_language_query, self.schema_cache)
+            sql_query = self._generate_sql_cached(natural_language_query, self._schema_fp)
             logger.info(f"Generated SQL: {sql_query}")
 
             # Validate the generated SQL
@@ -337,26 +704,33 @@ class SQLAgent:
     def _execute_query(self, sql_query: str) -> QueryResult:
         """Execute a SQL query and return formatted results."""
         try:
-            with psycopg2.connect(**self.db_params) as conn, conn.cursor() as cursor:
+            # A named (server-side) cursor streams the result in FETCH_BATCH_SIZE
+            # batches instead of the driver buffering every row at execute time
+            with (
+                self._get_conn() as conn,
+                conn.cursor(
+                    name="nl2sql_result", cursor_factory=psycopg2.extras.RealDictCursor
+                ) as cursor,
+            ):
                 cursor.execute(sql_query)
 
-                # Get column names
-                columns = [desc[0] for desc in cursor.description]
-
-                # Fetch all results
-                rows = cursor.fetchall()
-
-                # Convert to list of dictionaries
+                # Rows already come back as dictionaries
                 data = []
-                for row in rows:
-                    row_dict = {}
-                    for i, value in enumerate(row):
-                        # Handle datetime objects
-                        if hasattr(value, "isoformat"):
-                            row_dict[columns[i]] = value.isoformat()
-                        else:
-                            row_dict[columns[i]] = value
-                    data.append(row_dict)
+                datetime_columns = None
+                while batch := cursor.fetchmany(self.FETCH_BATCH_SIZE):
+                    if datetime_columns is None:
+                        # Only date/time columns need converting; a server-side cursor
+                        # has its description once the first batch is fetched
+                        datetime_columns = [
+                            desc[0]
+                            for desc in cursor.description
+                            if desc[1] in DATETIME_TYPE_CODES
+                        ]
+                    for row in batch:
+                        for column in datetime_columns:
+                            if row[column] is not None:
+                                row[column] = row[column].isoformat()
+                    data.extend(batch)
 
                 return QueryResult(success=True, data=data, query=sql_query)
 
@@ -364,6 +738,12 @@ class SQLAgent:
             logger.error(f"Database query error: {e}")
             return QueryResult(success=False, error=str(e), query=sql_query)
 
+    def warm_up(self) -> None:
+        """Open a pooled connection ahead of the first real query."""
+        result = self._execute_query("SELECT 1")
+        if not result.success:
+            logger.warning(f"Warm-up query failed: {result.error}")
+
     def get_schema_summary(self) -> str:
         """Get a human-readable summary of the database schema."""
         if not self.schema_cache:
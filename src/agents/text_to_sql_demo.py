@@ -7,9 +7,14 @@ It showcases natural language to SQL conversion with practical examples.
 
 import logging
 import os
+import re
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Any
+from typing import Any, Final
+
+import numpy as np
 
 # Add src to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,17 +25,107 @@ from agents.sql_agent import SQLAgent
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Demo queries in flight at once; lower it if Bedrock starts throttling
+DEMO_MAX_WORKERS: Final = int(os.getenv("DEMO_MAX_WORKERS", "8"))
+
+# Where interactive-mode questions are remembered between sessions
+HISTORY_FILE: Final = os.path.expanduser(
+    os.getenv("TEXT_TO_SQL_HISTORY", "~/.text_to_sql_history")
+)
+
+# Cosine similarity above which a cached question's SQL is reused as-is
+SEMANTIC_CACHE_THRESHOLD: Final = 0.97
+
+# Tables whose row counts are shown in the schema overview, fetched in one round trip
+DEMO_COUNT_TABLES: Final = ("customers", "products", "orders", "order_items", "suppliers")
+DEMO_COUNT_QUERY: Final = " UNION ALL ".join(
+    f"SELECT '{table}' AS table_name, COUNT(*) AS count FROM workshop.{table}"
+    for table in DEMO_COUNT_TABLES
+)
+
+# Categorized demo queries
+DEMO_CATEGORIES: Final = (
+    (
+        "📊 Basic Queries",
+        (
+            "How many customers do we have?",
+            "Show me all products in the Electronics category",
+            "What customers are from California?",
+        ),
+    ),
+    (
+        "📈 Aggregation & Analytics",
+        (
+            "What are the top 5 best-selling products?",
+            "Who are our top 3 customers by total spending?",
+            "What's the average order value?",
+            "Show me total revenue by product category",
+        ),
+    ),
+    (
+        "🔗 Join Queries",
+        (
+            "Show me customer names and their order counts",
+            "Which products have never been ordered?",
+            "List all orders with customer and product details",
+        ),
+    ),
+    (
+        "📅 Time-Based Queries",
+        (
+            "Show me orders placed in November 2024",
+            "What's our revenue for the last 30 days?",
+            "Find customers who haven't ordered in the past month",
+        ),
+    ),
+    (
+        "🎯 Advanced Analytics",
+        (
+            "Which customers have ordered from multiple categories?",
+            "What's the profit margin for each product?",
+            "Show me monthly sales trends",
+            "Find suppliers with the most expensive products on average",
+        ),
+    ),
+)
+
+# Keywords that start a new line in formatted SQL; matched in a single pass
+SQL_BREAK_KEYWORDS_RE: Final = re.compile(
+    r" (SELECT|FROM|WHERE|GROUP BY|ORDER BY|HAVING|(?:LEFT |RIGHT )?JOIN)(?= )"
+)
+
 
 class TextToSQLDemo:
     """Demonstration class for Text-to-SQL capabilities."""
 
-    def __init__(self, db_params: dict[str, str], aws_endpoint: str | None = None):
-        """Initialize the demo with database and AWS configuration."""
+    # Longest cell shown in a result row; longer values are cut to fit with "..."
+    MAX_VALUE_WIDTH = 30
+
+    def __init__(
+        self,
+        db_params: dict[str, str],
+        aws_endpoint: str | None = None,
+        semantic_cache: bool = False,
+    ):
+        """Initialize the demo with database and AWS configuration.
+
+        With ``semantic_cache`` a question whose embedding is close enough to an
+        earlier one reuses that question's SQL. It loads a sentence-transformers
+        model, and near-identical questions that differ only in a number ("top 3"
+        vs "top 5") can match, so it is off by default.
+        """
         self.db_params = db_params
         self.aws_endpoint = aws_endpoint
         self.sql_agent = None
         self.demo_results = []
 
+        # Semantic NL->SQL cache: unit-normalized question embeddings and their SQL
+        self._embedder = None
+        self._semantic_cache_enabled = semantic_cache
+        self._nl_cache_embs = None
+        self._nl_cache_sql: list[str] = []
+        self._nl_cache_lock = threading.Lock()
+
     def initialize_agent(self) -> bool:
         """Initialize the SQL agent."""
         try:
@@ -43,6 +138,9 @@ class TextToSQLDemo:
             print("📊 Loading database schema...")
             self.sql_agent.refresh_schema("workshop")
 
+            # Open the agent's query connection in the background while the user reads
+            threading.Thread(target=self.sql_agent.warm_up, daemon=True).start()
+
             print("✅ SQL Agent initialized successfully!")
             print(f"📋 Cached schema for {len(self.sql_agent.schema_cache)} tables\n")
 
@@ -66,20 +164,11 @@ class TextToSQLDemo:
 
         # Display sample data counts
         try:
-            sample_queries = {
-                "customers": "SELECT COUNT(*) FROM workshop.customers",
-                "products": "SELECT COUNT(*) FROM workshop.products",
-                "orders": "SELECT COUNT(*) FROM workshop.orders",
-                "order_items": "SELECT COUNT(*) FROM workshop.order_items",
-                "suppliers": "SELECT COUNT(*) FROM workshop.suppliers",
-            }
-
             print("📈 Sample Data Counts:")
-            for table, query in sample_queries.items():
-                result = self.sql_agent._execute_query(query)
-                if result.success and result.data:
-                    count = result.data[0]["count"]
-                    print(f"   {table:15}: {count:>6} records")
+            result = self.sql_agent._execute_query(DEMO_COUNT_QUERY)
+            if result.success and result.data:
+                for row in result.data:
+                    print(f"   {row['table_name']:15}: {row['count']:>6} records")
             print()
 
         except Exception as e:
@@ -95,52 +184,91 @@ class TextToSQLDemo:
         print("🔍 TEXT-TO-SQL DEMONSTRATION")
         print("=" * 60)
 
-        # Categorized demo queries
-        demo_categories = {
-            "📊 Basic Queries": [
-                "How many customers do we have?",
-                "Show me all products in the Electronics category",
-                "What customers are from California?",
-            ],
-            "📈 Aggregation & Analytics": [
-                "What are the top 5 best-selling products?",
-                "Who are our top 3 customers by total spending?",
-                "What's the average order value?",
-                "Show me total revenue by product category",
-            ],
-            "🔗 Join Queries": [
-                "Show me customer names and their order counts",
-                "Which products have never been ordered?",
-                "List all orders with customer and product details",
-            ],
-            "📅 Time-Based Queries": [
-                "Show me orders placed in November 2024",
-                "What's our revenue for the last 30 days?",
-                "Find customers who haven't ordered in the past month",
-            ],
-            "🎯 Advanced Analytics": [
-                "Which customers have ordered from multiple categories?",
-                "What's the profit margin for each product?",
-                "Show me monthly sales trends",
-                "Find suppliers with the most expensive products on average",
-            ],
-        }
-
-        for category, queries in demo_categories.items():
-            print(f"\n{category}")
-            print("-" * 50)
-
-            for i, query in enumerate(queries, 1):
-                print(f"\n🔸 Query {i}: {query}")
-                self._process_demo_query(query)
-
-    def _process_demo_query(self, query: str):
-        """Process a single demo query and display results."""
+        # Queries are I/O-bound (Bedrock + Postgres), so run them concurrently and
+        # display the results in their original order as they complete
+        with ThreadPoolExecutor(max_workers=DEMO_MAX_WORKERS) as executor:
+            pending = {
+                category: [(query, executor.submit(self._run_query, query)) for query in queries]
+                for category, queries in DEMO_CATEGORIES
+            }
+
+            for category, submitted in pending.items():
+                print(f"\n{category}")
+                print("-" * 50)
+
+                for i, (query, future) in enumerate(submitted, 1):
+                    print(f"\n🔸 Query {i}: {query}")
+                    self._process_demo_query(query, future)
+
+    def _run_query(self, query: str) -> tuple[Any, float]:
+        """Run a query through the agent and return the result with its execution time."""
         start_time = datetime.now()
 
-        try:
+        # Near-duplicate questions reuse cached SQL and skip the LLM call entirely
+        query_emb = self._embed_question(query)
+        cached_sql = self._lookup_cached_sql(query_emb)
+        if cached_sql:
+            result = self.sql_agent._execute_query(cached_sql)
+        else:
             result = self.sql_agent.query(query)
-            execution_time = (datetime.now() - start_time).total_seconds()
+            if result.success and result.query:
+                self._store_cached_sql(query_emb, result.query)
+
+        return result, (datetime.now() - start_time).total_seconds()
+
+    def _embed_question(self, query: str) -> np.ndarray | None:
+        """Embed a question for the semantic cache, or return None if it is unavailable."""
+        if not self._semantic_cache_enabled:
+            return None
+
+        try:
+            with self._nl_cache_lock:
+                if self._embedder is None:
+                    from rag.embeddings import EmbeddingGenerator
+
+                    self._embedder = EmbeddingGenerator()
+            embedding = self._embedder.generate_one(query).astype(np.float32)
+        except Exception as e:
+            logger.warning(f"Semantic query cache disabled: {e}")
+            self._semantic_cache_enabled = False
+            return None
+
+        return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+    def _lookup_cached_sql(self, query_emb: np.ndarray | None) -> str | None:
+        """Return the SQL of the most similar cached question if it is close enough."""
+        if query_emb is None:
+            return None
+
+        with self._nl_cache_lock:
+            if self._nl_cache_embs is None:
+                return None
+            similarities = self._nl_cache_embs @ query_emb
+            best = int(similarities.argmax())
+            if similarities[best] >= SEMANTIC_CACHE_THRESHOLD:
+                return self._nl_cache_sql[best]
+        return None
+
+    def _store_cached_sql(self, query_emb: np.ndarray | None, sql: str):
+        """Remember the SQL generated for a question."""
+        if query_emb is None:
+            return
+
+        with self._nl_cache_lock:
+            if self._nl_cache_embs is None:
+                self._nl_cache_embs = query_emb[np.newaxis, :]
+            else:
+                self._nl_cache_embs = np.vstack([self._nl_cache_embs, query_emb])
+            self._nl_cache_sql.append(sql)
+
+    def _process_demo_query(self, query: str, pending: Future | None = None):
+        """Process a single demo query and display results.
+
+        ``pending`` is the future of a query already submitted to a thread pool;
+        without it the query runs inline.
+        """
+        try:
+            result, execution_time = pending.result() if pending else self._run_query(query)
 
             if result.success:
                 print("   ✅ Generated SQL:")
@@ -192,42 +320,31 @@ class TextToSQLDemo:
             print(f"   ❌ Unexpected error: {e}")
             logger.error(f"Error processing query '{query}': {e}")
 
-    def _format_sql(self, sql: str) -> str:
+    @staticmethod
+    def _format_sql(sql: str) -> str:
         """Format SQL query for better readability."""
-        # Simple SQL formatting
-        sql = sql.strip()
-
-        # Add line breaks after common SQL keywords
-        keywords = [
-            "SELECT",
-            "FROM",
-            "WHERE",
-            "GROUP BY",
-            "ORDER BY",
-            "HAVING",
-            "JOIN",
-            "LEFT JOIN",
-            "RIGHT JOIN",
-        ]
-        for keyword in keywords:
-            sql = sql.replace(f" {keyword} ", f"\n{keyword} ")
-
-        return sql
+        # Add line breaks before common SQL keywords
+        return SQL_BREAK_KEYWORDS_RE.sub(r"\n\1", sql.strip())
 
     def _format_row(self, row: dict[str, Any]) -> str:
         """Format a database row for display."""
-        formatted_items = []
-        for key, value in row.items():
-            if isinstance(value, int | float):
-                formatted_items.append(f"{key}: {value}")
-            else:
-                # Truncate long strings
-                str_value = str(value) if value is not None else "NULL"
-                if len(str_value) > 30:
-                    str_value = str_value[:27] + "..."
-                formatted_items.append(f"{key}: {str_value}")
-
-        return "{" + ", ".join(formatted_items) + "}"
+        # A list comprehension rather than a generator: str.join materializes its input anyway
+        items = ", ".join([f"{key}: {self._format_value(value)}" for key, value in row.items()])
+        return f"{{{items}}}"
+
+    @classmethod
+    def _format_value(cls, value: Any) -> Any:
+        """Format a single cell, truncating long strings."""
+        value_type = type(value)
+        if value_type is int or value_type is float:
+            return value
+        if value is None:
+            return "NULL"
+
+        str_value = str(value)
+        if len(str_value) <= cls.MAX_VALUE_WIDTH:
+            return str_value
+        return str_value[: cls.MAX_VALUE_WIDTH - 3] + "..."
 
     def display_demo_summary(self):
         """Display a summary of the demonstration results."""
@@ -277,6 +394,33 @@ class TextToSQLDemo:
         print("Ask questions about the workshop database in natural language.")
         print("Type 'help' for examples, 'schema' to see database structure, or 'quit' to exit.\n")
 
+        readline = self._load_input_history()
+        try:
+            self._interactive_loop()
+        finally:
+            if readline:
+                try:
+                    readline.write_history_file(HISTORY_FILE)
+                except OSError as e:
+                    logger.warning(f"Could not save query history: {e}")
+
+    @staticmethod
+    def _load_input_history():
+        """Enable arrow-key recall of earlier questions, when readline is available."""
+        try:
+            import readline
+        except ImportError:
+            return None
+
+        try:
+            readline.read_history_file(HISTORY_FILE)
+        except OSError:
+            pass
+        readline.set_history_length(1000)
+        return readline
+
+    def _interactive_loop(self):
+        """Read and answer questions until the user quits."""
         while True:
             try:
                 user_query = input("💬 Your question: ").strip()
@@ -8,6 +8,8 @@ between seemingly unrelated texts spanning medieval, enlightenment, and
 modern philosophy.
 """
 
+import mmap
+import re
 import sys
 from pathlib import Path
 
@@ -18,6 +20,13 @@ from src.rag.embeddings import EmbeddingGenerator
 from src.rag.vector_store import FAISSVectorStore
 from src.utils.pdf_extractor import PDFExtractor
 
+# Longer words are often more meaningful; common long filler words are skipped
+KEY_TERM_RE = re.compile(r"[a-z]{7,}")
+KEY_TERM_STOPWORDS = frozenset({
+    "however", "therefore", "something", "anything", "nothing",
+    "because", "between", "through", "without", "against",
+})
+
 
 class PhilosophicalRAG:
     """RAG system for philosophical texts with thesaurus augmentation."""
@@ -26,8 +35,16 @@ class PhilosophicalRAG:
         self.chunker = SimpleChunker(chunk_size=300, overlap=50)
         self.embedder = EmbeddingGenerator()
         self.vector_store = FAISSVectorStore(self.embedder.dimension)
-        self.documents = []
-        self.metadata = []
+
+    @property
+    def documents(self) -> list[str]:
+        """Chunk texts, shared with the vector store rather than copied."""
+        return self.vector_store.documents
+
+    @property
+    def metadata(self) -> list[dict]:
+        """Chunk metadata, shared with the vector store rather than copied."""
+        return self.vector_store.metadata
 
     def load_texts(self):
         """Load all philosophical texts and thesaurus."""
@@ -37,33 +54,25 @@ class PhilosophicalRAG:
         boethius_path = data_dir / "consolation_of_philosophy.txt"
         if boethius_path.exists():
             print("📜 Loading Boethius - Consolation of Philosophy...")
-            with open(boethius_path, encoding='utf-8') as f:
-                text = f.read()
-                # Skip Project Gutenberg header
-                start = text.find("BOOK I.")
-                if start > 0:
-                    text = text[start:]
-                self._add_text(text, "Boethius", "Consolation of Philosophy")
+            # Skip Project Gutenberg header
+            text = self._read_text_from(boethius_path, b"BOOK I.")
+            self._add_text(text, "Boethius", "Consolation of Philosophy")
 
         # Load Kant
         kant_path = data_dir / "critique_of_pure_reason.txt"
         if kant_path.exists():
             print("🧠 Loading Kant - Critique of Pure Reason...")
-            with open(kant_path, encoding='utf-8') as f:
-                text = f.read()
-                # Skip header
-                start = text.find("PREFACE")
-                if start > 0:
-                    text = text[start:]
-                self._add_text(text[:200000], "Kant", "Critique of Pure Reason")  # First part only
+            # Skip header
+            text = self._read_text_from(kant_path, b"PREFACE", max_chars=200000)
+            self._add_text(text, "Kant", "Critique of Pure Reason")  # First part only
 
         # Load Wittgenstein's Philosophical Grammar (PDF)
         wittgenstein_path = data_dir / "wittgenstein_philosophical_grammar.pdf"
         if wittgenstein_path.exists():
             print("🔍 Loading Wittgenstein - Philosophical Grammar...")
             try:
-                extractor = PDFExtractor()
-                text = extractor.extract_text(str(wittgenstein_path), max_pages=30)
+                with PDFExtractor() as extractor:
+                    text = extractor.extract_text(str(wittgenstein_path), max_pages=30)
                 self._add_text(text, "Wittgenstein", "Philosophical Grammar")
             except Exception as e:
                 print(f"Could not load Wittgenstein: {e}")
@@ -73,41 +82,63 @@ class PhilosophicalRAG:
         if thesaurus_path.exists():
             print("📚 Loading Roget's Thesaurus...")
             try:
-                extractor = PDFExtractor()
-                text = extractor.extract_text(str(thesaurus_path), max_pages=50)
+                with PDFExtractor() as extractor:
+                    text = extractor.extract_text(str(thesaurus_path), max_pages=50)
                 self._add_text(text, "Roget", "Thesaurus")
             except Exception as e:
                 print(f"Could not load thesaurus: {e}")
 
         print(f"\n✅ Loaded {len(self.documents)} document chunks")
 
+    @staticmethod
+    def _read_text_from(path: Path, marker: bytes, max_chars: int | None = None) -> str:
+        """Read a UTF-8 text file starting at ``marker``, decoding only what is kept."""
+        if path.stat().st_size == 0:
+            return ""
+
+        # Map the file so only the kept slice is copied into Python memory; the
+        # marker search runs over the page cache and the header is never decoded
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = mm.find(marker)
+            if start <= 0:
+                start = 0
+
+            if max_chars is None:
+                text = mm[start:].decode('utf-8')
+            else:
+                # A UTF-8 character is at most 4 bytes, so this slice always covers
+                # max_chars; back the end up off any continuation bytes so it does
+                # not cut a character in half
+                end = min(start + max_chars * 4, len(mm))
+                while start < end < len(mm) and mm[end] & 0xC0 == 0x80:
+                    end -= 1
+                text = mm[start:end].decode('utf-8')
+
+        # Match text-mode universal newline handling (Gutenberg files use CRLF)
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text if max_chars is None else text[:max_chars]
+
     def _add_text(self, text: str, author: str, title: str):
         """Add text to the vector store with metadata."""
         chunks = self.chunker.chunk_text(text)
-
-        for chunk in chunks:
-            self.documents.append(chunk['text'])
-            self.metadata.append({
-                'author': author,
-                'title': title,
-                'chunk_index': chunk['index']
-            })
+        texts = [c['text'] for c in chunks]
+        metas = [{'author': author, 'title': title, 'chunk_index': c['index']} for c in chunks]
 
         # Generate embeddings and add to store
-        embeddings = self.embedder.generate([c['text'] for c in chunks])
-        self.vector_store.add(
-            embeddings,
-            [c['text'] for c in chunks],
-            [{'author': author, 'title': title, 'chunk_index': c['index']} for c in chunks]
-        )
-
-    def philosophical_query(self, question: str, n_results: int = 5):
-        """Query across philosophical texts with thesaurus connections."""
+        embeddings = self.embedder.generate(texts)
+        self.vector_store.add(embeddings, texts, metas)
+
+    def philosophical_query(self, question: str, n_results: int = 5, query_emb=None):
+        """Query across philosophical texts with thesaurus connections.
+
+        Pass a precomputed ``query_emb`` to skip embedding the question again.
+        """
         print(f"\n🤔 Question: {question}")
         print("=" * 60)
 
         # Get query embedding
-        query_emb = self.embedder.generate(question)[0]
+        if query_emb is None:
+            query_emb = self.embedder.generate_one(question)
 
         # Search across all texts
         results = self.vector_store.search(query_emb, k=n_results)
@@ -138,19 +169,21 @@ class PhilosophicalRAG:
         key_terms = set()
         for result in results[:3]:
             # Simple term extraction (in production, use NLP)
-            words = result['document'].lower().split()
-            for word in words:
-                if len(word) > 6:  # Longer words are often more meaningful
-                    key_terms.add(word)
+            words = KEY_TERM_RE.findall(result['document'].lower())
+            key_terms.update(word for word in words if word not in KEY_TERM_STOPWORDS)
 
         print(f"\n🔗 Looking for thesaurus connections for terms: {list(key_terms)[:5]}...")
 
         # Search thesaurus for these terms
         thesaurus_results = []
-        for term in list(key_terms)[:3]:
-            term_emb = self.embedder.generate(term)[0]
-            results = self.vector_store.search(term_emb, k=10)
-
+        terms = list(key_terms)[:3]
+        batched_results = []
+        if terms:
+            # One embedding call and one index query for all terms
+            term_embs = self.embedder.generate(terms)
+            batched_results = self.vector_store.search_batch(term_embs, k=10)
+
+        for term, results in zip(terms, batched_results):
             for result in results:
                 if result['metadata']['author'] == 'Roget':
                     thesaurus_results.append((term, result))
@@ -176,8 +209,11 @@ def demo_philosophical_connections():
         "What is the meaning of meaning itself?"
     ]
 
-    for query in queries:
-        rag.philosophical_query(query)
+    # Embed every question in one batch up front
+    query_embs = rag.embedder.generate(queries)
+
+    for query, query_emb in zip(queries, query_embs):
+        rag.philosophical_query(query, query_emb=query_emb)
         input("\nPress Enter for next query...")
 
 if __name__ == "__main__":
@@ -2,20 +2,49 @@
 import boto3
 import json
 import time
+from functools import lru_cache
 from typing import Dict, Any
 
 
+@lru_cache(maxsize=8)
+def _session(region_name: str) -> boto3.Session:
+    """Shared boto3 session per region"""
+    return boto3.Session(region_name=region_name)
+
+
+@lru_cache(maxsize=32)
+def _client(region_name: str, service_name: str):
+    """Shared boto3 client per region and service (loading service models is slow)"""
+    return _session(region_name).client(service_name)
+
+
 class AWSSetup:
     """Handles AWS infrastructure setup for RAG applications"""
     
     def __init__(self, region_name='us-east-1'):
         self.region = region_name
-        self.session = boto3.Session(region_name=region_name)
-        self.bedrock_client = self.session.client('bedrock-agent')
-        self.iam_client = self.session.client('iam')
-        self.s3_client = self.session.client('s3')
-        self.sts_client = self.session.client('sts')
-        self.logs_client = self.session.client('logs')
+        self.session = _session(region_name)
+    
+    # Clients are created on first use and shared across AWSSetup instances
+    @property
+    def bedrock_client(self):
+        return _client(self.region, 'bedrock-agent')
+    
+    @property
+    def iam_client(self):
+        return _client(self.region, 'iam')
+    
+    @property
+    def s3_client(self):
+        return _client(self.region, 's3')
+    
+    @property
+    def sts_client(self):
+        return _client(self.region, 'sts')
+    
+    @property
+    def logs_client(self):
+        return _client(self.region, 'logs')
         
     def get_aws_account_info(self) -> Dict[str, str]:
         """Get AWS account information"""
@@ -3,6 +3,8 @@
 import re
 from typing import Any
 
+import numpy as np
+
 
 class SimpleChunker:
     """A simple document chunker with overlapping windows."""
@@ -13,38 +15,34 @@ class SimpleChunker:
 
     def chunk_text(self, text: str) -> list[dict[str, Any]]:
         """Split text into overlapping chunks."""
-        chunks = []
-        start = 0
-        text_length = len(text)
+        stride = self.chunk_size - self.overlap
+        if stride <= 0:
+            raise ValueError("overlap must be smaller than chunk_size")
 
-        while start < text_length:
-            end = min(start + self.chunk_size, text_length)
-            chunk_text = text[start:end]
-
-            chunks.append({
-                'text': chunk_text,
-                'start': start,
-                'end': end,
-                'index': len(chunks)
-            })
+        # Compute every window up front instead of stepping through a loop
+        text_length = len(text)
+        starts = np.arange(0, text_length, stride)
+        ends = np.minimum(starts + self.chunk_size, text_length)
 
-            # Move to next chunk with overlap
-            start += (self.chunk_size - self.overlap)
-
-        return chunks
+        return [
+            {'text': text[start:end], 'start': start, 'end': end, 'index': i}
+            for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist()))
+        ]
 
 
 class SentenceChunker:
     """Chunk text by sentences while respecting size limits."""
 
+    # Simple sentence splitting (could be improved with spaCy)
+    SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
     def __init__(self, max_chunk_size: int = 512, min_chunk_size: int = 100):
         self.max_chunk_size = max_chunk_size
         self.min_chunk_size = min_chunk_size
 
     def chunk_text(self, text: str) -> list[dict[str, Any]]:
         """Split text into sentence-aware chunks."""
-        # Simple sentence splitting (could be improved with spaCy)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = self.SENTENCE_SPLIT_RE.split(text)
 
         chunks = []
         current_chunk = []
@@ -1,12 +1,33 @@
 # Cost analysis utilities for RAG
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Optional
 
 
+@lru_cache(maxsize=1)
+def _get_encoder():
+    """Load the cl100k_base tokenizer once; None when tiktoken is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _count_tokens(texts: List[str]) -> int:
+    """Count tokens with tiktoken's batched encoder, falling back to chars / 4"""
+    encoder = _get_encoder()
+    if encoder is None:
+        # Rough estimation: 1 token ≈ 4 characters
+        return sum(len(text) for text in texts) // 4
+    return sum(len(tokens) for tokens in encoder.encode_batch(texts))
+
+
 class CostAnalyzer:
     """Analyze costs for Bedrock RAG operations"""
     
-    # Bedrock pricing per 1000 tokens (as of 2024)
-    BEDROCK_MODEL_PRICING = {
+    # Bedrock pricing per 1000 tokens (as of 2024); read-only
+    BEDROCK_MODEL_PRICING = MappingProxyType({
         # Claude models
         "anthropic.claude-3-opus-20240229-v1:0": {
             "input": 0.015,
@@ -56,7 +77,13 @@ class CostAnalyzer:
             "input": 0.0001,
             "output": 0
         }
-    }
+    })
+    
+    # (input, output) price per single token, derived once from the table above
+    _PRICING_PER_TOKEN = MappingProxyType({
+        model_id: (pricing["input"] / 1000.0, pricing["output"] / 1000.0)
+        for model_id, pricing in BEDROCK_MODEL_PRICING.items()
+    })
     
     def __init__(self):
         self.total_costs = {
@@ -70,23 +97,22 @@ class CostAnalyzer:
                            input_tokens: int,
                            output_tokens: int = 0) -> float:
         """Calculate cost for tokens based on model pricing"""
-        if model_id not in self.BEDROCK_MODEL_PRICING:
+        return self._token_cost(model_id, input_tokens, output_tokens)
+    
+    @staticmethod
+    def _token_cost(model_id: str, input_tokens: int, output_tokens: int = 0) -> float:
+        prices = CostAnalyzer._PRICING_PER_TOKEN.get(model_id)
+        if prices is None:
             raise ValueError(f"Unknown model: {model_id}")
         
-        pricing = self.BEDROCK_MODEL_PRICING[model_id]
-        
-        input_cost = (input_tokens / 1000) * pricing["input"]
-        output_cost = (output_tokens / 1000) * pricing["output"]
-        
-        return input_cost + output_cost
+        input_price, output_price = prices
+        return input_tokens * input_price + output_tokens * output_price
     
     def estimate_embedding_cost(self,
                               texts: List[str],
                               model_id: str = "amazon.titan-embed-text-v2:0") -> Dict[str, float]:
         """Estimate cost for embedding texts"""
-        # Rough estimation: 1 token ≈ 4 characters
-        total_chars = sum(len(text) for text in texts)
-        estimated_tokens = total_chars // 4
+        estimated_tokens = _count_tokens(texts)
         
         cost = self.calculate_token_cost(model_id, estimated_tokens)
         
@@ -104,15 +130,9 @@ class CostAnalyzer:
                                    embedding_model: str = "amazon.titan-embed-text-v2:0") -> Dict[str, float]:
         """Estimate cost for creating a knowledge base"""
         total_chunks = num_documents * chunks_per_doc
-        total_chars = num_documents * avg_doc_size_chars
-        estimated_tokens = total_chars // 4
-        
-        embedding_cost = self.calculate_token_cost(embedding_model, estimated_tokens)
-        
-        # Storage cost estimation (OpenSearch Serverless)
-        # Rough estimate: $0.024 per GB-hour
-        storage_gb = (total_chars / 1e9) * 2  # Assume 2x storage for indices
-        monthly_storage_cost = storage_gb * 0.024 * 24 * 30
+        estimated_tokens, embedding_cost, monthly_storage_cost = self._knowledge_base_cost(
+            num_documents, avg_doc_size_chars, embedding_model
+        )
         
         return {
             "documents": num_documents,
@@ -124,6 +144,24 @@ class CostAnalyzer:
             "monthly_recurring_cost": monthly_storage_cost
         }
     
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _knowledge_base_cost(num_documents: int,
+                             avg_doc_size_chars: int,
+                             embedding_model: str) -> tuple:
+        """Pure core of estimate_knowledge_base_cost, memoized for parameter sweeps"""
+        total_chars = num_documents * avg_doc_size_chars
+        estimated_tokens = total_chars // 4
+        
+        embedding_cost = CostAnalyzer._token_cost(embedding_model, estimated_tokens)
+        
+        # Storage cost estimation (OpenSearch Serverless)
+        # Rough estimate: $0.024 per GB-hour
+        storage_gb = (total_chars / 1e9) * 2  # Assume 2x storage for indices
+        monthly_storage_cost = storage_gb * 0.024 * 24 * 30
+        
+        return estimated_tokens, embedding_cost, monthly_storage_cost
+    
     def estimate_rag_query_cost(self,
                               query: str,
                               num_retrieved_chunks: int = 5,
@@ -131,9 +169,36 @@ class CostAnalyzer:
                               generation_model: str = "anthropic.claude-3-haiku-20240307-v1:0",
                               embedding_model: str = "amazon.titan-embed-text-v2:0") -> Dict[str, float]:
         """Estimate cost for a single RAG query"""
+        context_tokens, output_tokens, embedding_cost, generation_cost = self._rag_query_cost(
+            query, num_retrieved_chunks, avg_chunk_size, generation_model, embedding_model
+        )
+        total_cost = embedding_cost + generation_cost
+        
+        return {
+            "query_length": len(query),
+            "retrieved_chunks": num_retrieved_chunks,
+            "context_tokens": context_tokens,
+            "output_tokens": output_tokens,
+            "embedding_cost": embedding_cost,
+            "generation_cost": generation_cost,
+            "total_cost": total_cost,
+            "models": {
+                "embedding": embedding_model,
+                "generation": generation_model
+            }
+        }
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _rag_query_cost(query: str,
+                        num_retrieved_chunks: int,
+                        avg_chunk_size: int,
+                        generation_model: str,
+                        embedding_model: str) -> tuple:
+        """Pure core of estimate_rag_query_cost, memoized for parameter sweeps"""
         # Query embedding cost
-        query_tokens = len(query) // 4
-        embedding_cost = self.calculate_token_cost(embedding_model, query_tokens)
+        query_tokens = _count_tokens([query])
+        embedding_cost = CostAnalyzer._token_cost(embedding_model, query_tokens)
         
         # Context tokens (retrieved chunks)
         context_tokens = num_retrieved_chunks * avg_chunk_size
@@ -145,27 +210,13 @@ class CostAnalyzer:
         output_tokens = total_input_tokens * 2
         
         # Generation cost
-        generation_cost = self.calculate_token_cost(
+        generation_cost = CostAnalyzer._token_cost(
             generation_model, 
             total_input_tokens, 
             output_tokens
         )
         
-        total_cost = embedding_cost + generation_cost
-        
-        return {
-            "query_length": len(query),
-            "retrieved_chunks": num_retrieved_chunks,
-            "context_tokens": context_tokens,
-            "output_tokens": output_tokens,
-            "embedding_cost": embedding_cost,
-            "generation_cost": generation_cost,
-            "total_cost": total_cost,
-            "models": {
-                "embedding": embedding_model,
-                "generation": generation_model
-            }
-        }
+        return context_tokens, output_tokens, embedding_cost, generation_cost
     
     def track_actual_cost(self,
                         operation_type: str,
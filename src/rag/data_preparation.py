@@ -3,32 +3,83 @@ import os
 import json
 import boto3
 import requests
-from typing import List, Dict, Any
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator
 from pathlib import Path
 import PyPDF2
 import pandas as pd
 
+from ..utils.pdf_extractor import iter_pdfium_pages
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _write_json(path, data, indent: bool = False):
+    """Write data as JSON, using orjson's C encoder when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        payload = orjson.dumps(data, option=option)
+    else:
+        payload = json.dumps(data, indent=2 if indent else None).encode()
+    with open(path, 'wb') as f:
+        f.write(payload)
+
 
 class DataPreparation:
     """Utilities for preparing data for RAG ingestion"""
     
     def __init__(self, s3_client=None):
         self.s3_client = s3_client or boto3.client('s3')
+        # One pooled HTTP session so repeated downloads reuse TCP/TLS connections
+        self.http = requests.Session()
+        
+    def _download_all(self, downloads: List[tuple], concurrency: int = 8, timeout: float = 30):
+        """Stream (url, file_path) pairs to disk concurrently.
+        
+        Returns each response (or the error raised) in input order. The body is only
+        written, chunk by chunk, when the status is 200, so a PDF is never held in memory.
+        """
+        def fetch(download):
+            url, file_path = download
+            partial_path = Path(f"{file_path}.part")
+            try:
+                with self.http.get(url, timeout=timeout, stream=True) as response:
+                    if response.status_code == 200:
+                        with open(partial_path, 'wb') as f:
+                            for block in response.iter_content(chunk_size=1 << 16):
+                                f.write(block)
+                        partial_path.replace(file_path)
+                    return response
+            except Exception as e:
+                partial_path.unlink(missing_ok=True)
+                return e
         
+        if not downloads:
+            return []
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(downloads))) as executor:
+            return list(executor.map(fetch, downloads))
+    
     def download_and_prepare_science_papers(self, 
                                           output_dir: str,
-                                          paper_urls: List[str]) -> str:
+                                          paper_urls: List[str],
+                                          concurrency: int = 8) -> str:
         """Download scientific papers and prepare for ingestion"""
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        for i, url in enumerate(paper_urls):
-            response = requests.get(url)
+        # Stream all papers to disk concurrently, then write metadata in order
+        downloads = [(url, output_path / f"paper_{i+1}.pdf") for i, url in enumerate(paper_urls)]
+        responses = self._download_all(downloads, concurrency)
+        
+        for i, (url, response) in enumerate(zip(paper_urls, responses)):
+            if isinstance(response, Exception):
+                print(f"Error downloading {url}: {str(response)}")
+                continue
             if response.status_code == 200:
-                file_path = output_path / f"paper_{i+1}.pdf"
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                
                 # Generate metadata
                 metadata = {
                     "source": url,
@@ -37,15 +88,15 @@ class DataPreparation:
                 }
                 
                 metadata_path = output_path / f"paper_{i+1}.pdf.metadata.json"
-                with open(metadata_path, 'w') as f:
-                    json.dump(metadata, f)
+                _write_json(metadata_path, metadata)
         
         return str(output_path)
     
     def download_and_prepare_10k_reports(self,
                                        output_dir: str,
                                        bucket_name: str = None,
-                                       region_name: str = "us-west-2") -> str:
+                                       region_name: str = "us-west-2",
+                                       concurrency: int = 8) -> str:
         """Download Amazon 10-K reports, prepare metadata, and optionally upload to S3"""
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
@@ -59,15 +110,17 @@ class DataPreparation:
         
         years = ["2023", "2022", "2021"]
         
-        for i, (url, year) in enumerate(zip(urls, years)):
+        # Stream the PDFs to disk concurrently; metadata is written in order below
+        downloads = [
+            (url, output_path / f"Amazon_10K_{year}.pdf") for url, year in zip(urls, years)
+        ]
+        responses = self._download_all(downloads, concurrency, timeout=30)
+        
+        for i, (url, year, response) in enumerate(zip(urls, years, responses)):
             try:
-                # Download the PDF
-                response = requests.get(url, timeout=30)
+                if isinstance(response, Exception):
+                    raise response
                 if response.status_code == 200:
-                    file_path = output_path / f"Amazon_10K_{year}.pdf"
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-                    
                     # Generate metadata
                     metadata = {
                         "company": "Amazon.com Inc.",
@@ -80,8 +133,7 @@ class DataPreparation:
                     }
                     
                     metadata_path = output_path / f"Amazon_10K_{year}.pdf.metadata.json"
-                    with open(metadata_path, 'w') as f:
-                        json.dump(metadata, f, indent=2)
+                    _write_json(metadata_path, metadata, indent=True)
                     
                     print(f"Downloaded Amazon 10-K report for {year}")
                 else:
@@ -100,18 +152,31 @@ class DataPreparation:
                         csv_path: str,
                         output_dir: str,
                         text_columns: List[str],
-                        metadata_columns: List[str] = None) -> str:
+                        metadata_columns: List[str] = None,
+                        concurrency: int = 8) -> str:
         """Convert CSV data to documents with metadata"""
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
         df = pd.read_csv(csv_path)
         
-        for idx, row in df.iterrows():
+        # Pull each column out once as a plain array instead of materializing a
+        # Series per row with iterrows
+        text_cols = [
+            (col, df[col].to_numpy(), df[col].notna().to_numpy())
+            for col in text_columns if col in df.columns
+        ]
+        metadata_cols = [
+            (col, [str(value) for value in df[col].to_numpy()])
+            for col in (metadata_columns or []) if col in df.columns
+        ]
+        
+        def write_document(position_and_idx):
+            position, idx = position_and_idx
             # Combine text columns
             text_content = "\n".join([
-                f"{col}: {row[col]}" for col in text_columns 
-                if col in df.columns and pd.notna(row[col])
+                f"{col}: {values[position]}" for col, values, present in text_cols
+                if present[position]
             ])
             
             # Create document
@@ -121,46 +186,80 @@ class DataPreparation:
             
             # Create metadata
             metadata = {"index": idx, "source": csv_path}
-            if metadata_columns:
-                for col in metadata_columns:
-                    if col in df.columns:
-                        metadata[col] = str(row[col])
+            for col, values in metadata_cols:
+                metadata[col] = values[position]
             
             metadata_path = output_path / f"document_{idx}.txt.metadata.json"
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f)
+            _write_json(metadata_path, metadata)
+        
+        # File writes are IO-bound, so overlap them; list() surfaces any write error
+        rows = list(enumerate(df.index.tolist()))
+        if rows:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(rows))) as executor:
+                list(executor.map(write_document, rows))
         
         return str(output_path)
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text content from PDF file"""
-        text = ""
+    def iter_pdf_pages(self, pdf_path: str, use_pdfium: bool = False) -> Iterator[str]:
+        """Yield the text of each PDF page in order without holding the whole document
+
+        ``use_pdfium`` reads pages with pypdfium2, several times faster than PyPDF2
+        but with differently spaced text, so it is off by default
+        """
+        if use_pdfium:
+            yield from iter_pdfium_pages(pdf_path)
+            return
+        
         with open(pdf_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
-        return text
+            for page in pdf_reader.pages:
+                yield page.extract_text()
+    
+    def extract_text_from_pdf(self, pdf_path: str, use_pdfium: bool = False) -> str:
+        """Extract text content from PDF file"""
+        # Join once instead of growing a string page by page
+        pages = self.iter_pdf_pages(pdf_path, use_pdfium)
+        return "".join(f"{page_text}\n" for page_text in pages)
     
     def upload_directory_to_s3(self,
                              local_directory: str,
                              bucket_name: str,
-                             s3_prefix: str = "") -> List[str]:
+                             s3_prefix: str = "",
+                             concurrency: int = 10) -> List[str]:
         """Upload directory contents to S3"""
-        uploaded_files = []
         local_path = Path(local_directory)
         
+        uploads = []
         for file_path in local_path.rglob('*'):
             if file_path.is_file():
                 relative_path = file_path.relative_to(local_path)
                 s3_key = f"{s3_prefix}/{relative_path}" if s3_prefix else str(relative_path)
-                
-                self.s3_client.upload_file(
-                    str(file_path),
-                    bucket_name,
-                    s3_key
-                )
-                uploaded_files.append(s3_key)
+                uploads.append((file_path, s3_key))
+        
+        if not uploads:
+            return []
+        
+        # Uploads are latency-bound, so run them side by side on the (thread-safe)
+        # client, one connection per file: the default concurrency matches the
+        # default client's pool of 10 connections
+        transfer_config = TransferConfig(use_threads=False)
+        uploaded_files = []
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(uploads))) as executor:
+            futures = [
+                (s3_key, executor.submit(self.s3_client.upload_file, str(file_path),
+                                         bucket_name, s3_key, Config=transfer_config))
+                for file_path, s3_key in uploads
+            ]
+            
+            # Collect in walk order so the returned keys stay deterministic; the
+            # first failure stops the queued uploads and is raised
+            try:
+                for s3_key, future in futures:
+                    future.result()
+                    uploaded_files.append(s3_key)
+            except Exception:
+                executor.shutdown(cancel_futures=True)
+                raise
         
         return uploaded_files
     
@@ -178,5 +277,4 @@ class DataPreparation:
             **metadata
         }
         
-        with open(metadata_path, 'w') as f:
-            json.dump(full_metadata, f, indent=2)
\ No newline at end of file
+        _write_json(metadata_path, full_metadata, indent=True)
\ No newline at end of file
@@ -1,67 +1,303 @@
 """Embedding generation for RAG pipelines."""
 
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Literal
 
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Cohere's input_type: documents are embedded for storage, queries for retrieval
+InputType = Literal["search_document", "search_query"]
+
 
 class EmbeddingGenerator:
     """Generate embeddings using sentence transformers or Bedrock."""
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_bedrock: bool = False):
+    # Concurrent invoke_model calls when embedding a batch through Bedrock
+    BEDROCK_MAX_WORKERS = 16
+    # Cohere embed models accept up to 96 texts per request
+    COHERE_MAX_BATCH = 96
+    # Titan v1 is used for any Bedrock model name that is not a Bedrock model id
+    BEDROCK_DEFAULT_MODEL = "amazon.titan-embed-text-v1"
+    # Output dimension of the Bedrock embedding models, so stores can be sized up front
+    BEDROCK_DIMENSIONS = {
+        "amazon.titan-embed-text-v1": 1536,
+        "amazon.titan-embed-text-v2:0": 1024,
+        "cohere.embed-english-v3": 1024,
+        "cohere.embed-multilingual-v3": 1024,
+    }
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_bedrock: bool = False,
+                 cache_size: int = 8192, device: str | None = None,
+                 batch_size: int | None = None, normalize: bool = False):
         self.model_name = model_name
         self.use_bedrock = use_bedrock
         self.model = None
         self.dimension = None
 
-        if not use_bedrock:
+        # Local model settings: device=None lets sentence-transformers pick CUDA/MPS
+        # when present; batch_size=None picks 128 on an accelerator and 64 on CPU
+        self.device = device
+        self.batch_size = batch_size
+        self.normalize = normalize
+
+        # Optional TokenBucket shared with other Bedrock callers (see RAGPipeline)
+        self.rate_limiter = None
+
+        # LRU of text digest -> embedding, so repeated texts skip the model/API call
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        if use_bedrock:
+            # Bedrock model ids go straight through; anything else means the Titan default
+            if model_name.startswith(("amazon.", "cohere.")):
+                self.bedrock_model_id = model_name
+            else:
+                self.bedrock_model_id = self.BEDROCK_DEFAULT_MODEL
+            self.dimension = self.BEDROCK_DIMENSIONS.get(self.bedrock_model_id)
+        else:
             self._init_sentence_transformer()
 
     def _init_sentence_transformer(self):
         """Initialize sentence transformer model."""
         try:
             from sentence_transformers import SentenceTransformer
-            self.model = SentenceTransformer(self.model_name)
+            self.model = SentenceTransformer(self.model_name, device=self.device)
             self.dimension = self.model.get_sentence_embedding_dimension()
-            logger.info(f"Loaded {self.model_name} with dimension {self.dimension}")
+            if self.batch_size is None:
+                self.batch_size = 64 if self.model.device.type == "cpu" else 128
+            logger.info(f"Loaded {self.model_name} with dimension {self.dimension} "
+                        f"on {self.model.device}")
         except ImportError:
             logger.error("sentence-transformers not installed")
             raise
 
-    def generate(self, texts: str | list[str]) -> np.ndarray:
-        """Generate embeddings for text or list of texts."""
+    def generate(self, texts: str | list[str],
+                 precision: Literal["fp32", "fp16", "int8"] = "fp32",
+                 input_type: InputType = "search_document") -> np.ndarray:
+        """Generate embeddings for text or list of texts.
+
+        ``fp16`` halves the memory of stored embeddings; ``int8`` quarters it using a
+        per-vector scale, which cosine similarity ignores. Pass
+        ``input_type="search_query"`` when embedding queries; Cohere models embed
+        queries and documents differently, other models ignore it.
+        """
+        if precision not in ("fp32", "fp16", "int8"):
+            raise ValueError(f"Unknown precision: {precision}")
+        return self._to_precision(self._generate_cached(texts, input_type), precision)
+
+    @staticmethod
+    def _cache_key(text: str, input_type: InputType) -> bytes:
+        # The input type personalizes the hash, so query and document vectors never mix
+        return hashlib.blake2b(text.encode(), digest_size=16,
+                               person=input_type.encode()).digest()
+
+    def _generate_cached(self, texts: str | list[str],
+                         input_type: InputType = "search_document") -> np.ndarray:
+        """Generate float32 embeddings, serving repeated texts from the cache."""
         if isinstance(texts, str):
             texts = [texts]
 
+        if not texts:
+            return self._generate_uncached(texts, input_type)
+
+        if not self.cache_size:
+            # No cache, but still embed each distinct text once and fan the rows back
+            # out with a single gather (repeated headers/footers are common in PDFs)
+            positions: dict[str, int] = {}
+            index = [positions.setdefault(text, len(positions)) for text in texts]
+            if len(positions) == len(texts):
+                return self._generate_uncached(texts, input_type)
+            return self._generate_uncached(list(positions), input_type)[index]
+
+        keys = [self._cache_key(text, input_type) for text in texts]
+
+        results: list[np.ndarray | None] = [None] * len(texts)
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+
+        # Only the distinct misses go to the model (a text repeated within the batch is
+        # embedded once), then get scattered back into input order
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            unique: dict[bytes, int] = {}
+            for i in misses:
+                unique.setdefault(keys[i], i)
+            computed = self._generate_uncached([texts[i] for i in unique.values()],
+                                               input_type)
+            with self._cache_lock:
+                embedded = {}
+                for key, embedding in zip(unique, computed):
+                    embedded[key] = self._cache[key] = self._cache_row(embedding)
+                for i in misses:
+                    results[i] = embedded[keys[i]]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return np.stack(results)
+
+    def generate_one(self, text: str,
+                     input_type: InputType = "search_document") -> np.ndarray:
+        """Generate the embedding for a single text as a 1-D vector.
+
+        Cached vectors are returned as read-only arrays; copy before modifying.
+        """
+        if not self.cache_size:
+            return self._generate_uncached([text], input_type)[0]
+
+        key = self._cache_key(text, input_type)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        embedding = self._cache_row(self._generate_uncached([text], input_type)[0])
+        with self._cache_lock:
+            self._cache[key] = embedding
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return embedding
+
+    @staticmethod
+    def _cache_row(embedding: np.ndarray) -> np.ndarray:
+        """Copy a row for the cache (so it does not pin the whole batch) and freeze it."""
+        row = embedding.copy()
+        row.setflags(write=False)
+        return row
+
+    @staticmethod
+    def _to_precision(embeddings: np.ndarray, precision: str) -> np.ndarray:
+        """Cast float32 embeddings down to the requested storage precision."""
+        if precision == "fp16":
+            return embeddings.astype(np.float16)
+        if precision == "int8":
+            # Symmetric per-vector scale so each row uses the full int8 range
+            scale = np.abs(embeddings).max(axis=-1, keepdims=True, initial=0.0)
+            scale[scale == 0] = 1.0
+            return np.round(embeddings * (127.0 / scale)).astype(np.int8)
+        return embeddings
+
+    def calibrate_batch_size(self, samples: list[str],
+                             sizes: tuple[int, ...] = (16, 32, 64, 128, 256),
+                             min_gain: float = 0.05) -> int:
+        """Pick the local model's batch size by timing a sweep over ``samples``.
+
+        Each size encodes the samples once to warm up and once timed; the sweep stops
+        at the first size that is not at least ``min_gain`` faster than the best so
+        far. Sets and returns ``batch_size``. Bedrock batching is fixed by the API,
+        so the current setting is returned unchanged there.
+        """
+        if self.use_bedrock or not samples:
+            return self.batch_size
+
+        best_size, best_rate = self.batch_size, 0.0
+        for size in sizes:
+            # Warm up at this size (allocator, kernels), then time a full pass
+            self.model.encode(samples[:size], batch_size=size, show_progress_bar=False)
+            start = time.perf_counter()
+            self.model.encode(samples, batch_size=size, show_progress_bar=False)
+            rate = len(samples) / max(time.perf_counter() - start, 1e-9)
+            if rate < best_rate * (1 + min_gain):
+                break
+            best_size, best_rate = size, rate
+
+        logger.info(f"Calibrated batch size {best_size} ({best_rate:.0f} texts/s)")
+        self.batch_size = best_size
+        return best_size
+
+    def _generate_uncached(self, texts: list[str],
+                           input_type: InputType = "search_document") -> np.ndarray:
+        """Generate embeddings straight from the model or Bedrock."""
         if self.use_bedrock:
-            return self._generate_bedrock_embeddings(texts)
+            return self._generate_bedrock_embeddings(texts, input_type)
         else:
-            return self.model.encode(texts, convert_to_numpy=True)
+            return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                     normalize_embeddings=self.normalize,
+                                     show_progress_bar=False)
 
-    def _generate_bedrock_embeddings(self, texts: list[str]) -> np.ndarray:
+    def _generate_bedrock_embeddings(self, texts: list[str],
+                                     input_type: InputType = "search_document") -> np.ndarray:
         """Generate embeddings using AWS Bedrock."""
         import json
+        from concurrent.futures import ThreadPoolExecutor
+
+        from ..utils.aws_client import RateLimitedClient, get_bedrock_runtime_client
 
-        from ..utils.aws_client import get_bedrock_runtime_client
+        # Throttling is handled in exactly one place: botocore's adaptive retries on
+        # the default client, or the shared token bucket when one is set
+        if self.rate_limiter is not None:
+            client = RateLimitedClient(get_bedrock_runtime_client(rate_limited=True),
+                                       self.rate_limiter)
+        else:
+            client = get_bedrock_runtime_client()
+
+        model_id = self.bedrock_model_id
 
-        client = get_bedrock_runtime_client()
-        embeddings = []
+        # Only the text varies per request, so splice its JSON-escaped form into a
+        # fixed byte template; orjson does the escaping and parsing when installed
+        if orjson is not None:
+            dumps, loads = orjson.dumps, orjson.loads
+        else:
+            dumps, loads = (lambda value: json.dumps(value).encode()), json.loads
 
-        for text in texts:
-            body = json.dumps({"inputText": text})
-            response = client.invoke_model(
-                modelId="amazon.titan-embed-text-v1",
-                body=body
-            )
-            result = json.loads(response['body'].read())
-            embeddings.append(result['embedding'])
+        def invoke(body: bytes) -> dict:
+            response = client.invoke_model(modelId=model_id, body=body)
+            return loads(response['body'].read())
 
-        return np.array(embeddings)
+        if model_id.startswith("cohere."):
+            # Cohere takes a whole batch of texts per request
+            step = self.COHERE_MAX_BATCH
+            payloads = [texts[i:i + step] for i in range(0, len(texts), step)]
+
+            def embed(batch: list[str]) -> list[list[float]]:
+                body = dumps({"texts": batch, "input_type": input_type})
+                return invoke(body)['embeddings']
+        else:
+            payloads = texts
+
+            def embed(text: str) -> list[list[float]]:
+                return [invoke(b'{"inputText":' + dumps(text) + b'}')['embedding']]
+
+        def fill(embeddings) -> np.ndarray:
+            # Copy each vector straight into one preallocated C-contiguous float32
+            # matrix instead of building a list of lists and converting it afterwards
+            out = None
+            for i, embedding in enumerate(embeddings):
+                if out is None:
+                    self.dimension = self.dimension or len(embedding)
+                    out = np.empty((len(texts), len(embedding)), dtype=np.float32)
+                out[i] = embedding
+            return out if out is not None else np.empty((0, self.dimension or 0), np.float32)
+
+        # Overlap the round trips; the client is thread-safe and map() keeps the
+        # input order
+        if len(payloads) <= 1:
+            return fill(chain.from_iterable(map(embed, payloads)))
+        workers = min(self.BEDROCK_MAX_WORKERS, len(payloads))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return fill(chain.from_iterable(executor.map(embed, payloads)))
 
     def similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """Calculate cosine similarity between two embeddings."""
+        embedding1 = embedding1.astype(np.float32, copy=False)
+        embedding2 = embedding2.astype(np.float32, copy=False)
         dot_product = np.dot(embedding1, embedding2)
         norm1 = np.linalg.norm(embedding1)
         norm2 = np.linalg.norm(embedding2)
@@ -70,13 +306,13 @@ class EmbeddingGenerator:
     def batch_similarity(self, query_embedding: np.ndarray,
                         embeddings: np.ndarray) -> np.ndarray:
         """Calculate similarity between query and multiple embeddings."""
-        # Normalize query
-        query_norm = query_embedding / np.linalg.norm(query_embedding)
+        # fp16/int8 embeddings are promoted to float32 for the BLAS call (a no-op for
+        # float32 input)
+        embeddings = embeddings.astype(np.float32, copy=False)
+        query_embedding = query_embedding.astype(np.float32, copy=False)
 
-        # Normalize all embeddings
+        # One matrix-vector product, then scale by the norms; no normalized copy of
+        # the (N, D) matrix is ever materialized
+        dots = embeddings @ query_embedding
         norms = np.linalg.norm(embeddings, axis=1)
-        normalized = embeddings / norms[:, np.newaxis]
-
-        # Compute similarities
-        similarities = np.dot(normalized, query_norm)
-        return similarities
+        return dots / (norms * np.linalg.norm(query_embedding))
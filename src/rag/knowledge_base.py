@@ -1,7 +1,10 @@
 # Bedrock Knowledge Base management
 import boto3
 import json
+import random
 import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from enum import Enum
 
@@ -13,6 +16,40 @@ class ChunkingStrategy(Enum):
     NONE = "NONE"
 
 
+def _chunking_config(strategy: ChunkingStrategy, max_tokens: int, overlap_percentage: int) -> Dict:
+    """Build a fresh chunking configuration dict for a strategy"""
+    if strategy == ChunkingStrategy.FIXED:
+        return {
+            "chunkingStrategy": "FIXED_SIZE",
+            "fixedSizeChunkingConfiguration": {
+                "maxTokens": max_tokens,
+                "overlapPercentage": overlap_percentage
+            }
+        }
+    elif strategy == ChunkingStrategy.SEMANTIC:
+        return {
+            "chunkingStrategy": "SEMANTIC",
+            "semanticChunkingConfiguration": {
+                "maxTokens": max_tokens,
+                "bufferSize": 0,
+                "breakpointPercentileThreshold": 95
+            }
+        }
+    elif strategy == ChunkingStrategy.HIERARCHICAL:
+        return {
+            "chunkingStrategy": "HIERARCHICAL",
+            "hierarchicalChunkingConfiguration": {
+                "levelConfigurations": [
+                    {"maxTokens": 1500},
+                    {"maxTokens": 300}
+                ],
+                "overlapTokens": 60
+            }
+        }
+    else:
+        return {"chunkingStrategy": "NONE"}
+
+
 class KnowledgeBaseManager:
     """Manages Bedrock Knowledge Bases"""
     
@@ -20,7 +57,13 @@ class KnowledgeBaseManager:
         self.region = region_name
         self.session = boto3.Session(region_name=region_name)
         self.bedrock_agent = self.session.client('bedrock-agent')
-        self.bedrock_runtime = self.session.client('bedrock-agent-runtime')
+        # Adaptive retries back off client-side on ThrottlingException when
+        # retrieve_many fans queries out concurrently
+        self.bedrock_runtime = self.session.client(
+            'bedrock-agent-runtime',
+            config=Config(retries={'mode': 'adaptive', 'max_attempts': 10},
+                          max_pool_connections=32)
+        )
         
     def create_knowledge_base(self, 
                             name: str,
@@ -98,36 +141,7 @@ class KnowledgeBaseManager:
     def _get_chunking_config(self, strategy: ChunkingStrategy, 
                            max_tokens: int, overlap_percentage: int) -> Dict:
         """Get chunking configuration based on strategy"""
-        if strategy == ChunkingStrategy.FIXED:
-            return {
-                "chunkingStrategy": "FIXED_SIZE",
-                "fixedSizeChunkingConfiguration": {
-                    "maxTokens": max_tokens,
-                    "overlapPercentage": overlap_percentage
-                }
-            }
-        elif strategy == ChunkingStrategy.SEMANTIC:
-            return {
-                "chunkingStrategy": "SEMANTIC",
-                "semanticChunkingConfiguration": {
-                    "maxTokens": max_tokens,
-                    "bufferSize": 0,
-                    "breakpointPercentileThreshold": 95
-                }
-            }
-        elif strategy == ChunkingStrategy.HIERARCHICAL:
-            return {
-                "chunkingStrategy": "HIERARCHICAL",
-                "hierarchicalChunkingConfiguration": {
-                    "levelConfigurations": [
-                        {"maxTokens": 1500},
-                        {"maxTokens": 300}
-                    ],
-                    "overlapTokens": 60
-                }
-            }
-        else:
-            return {"chunkingStrategy": "NONE"}
+        return _chunking_config(strategy, max_tokens, overlap_percentage)
     
     def start_ingestion_job(self, knowledge_base_id: str, data_source_id: str) -> str:
         """Start an ingestion job to sync data"""
@@ -144,9 +158,10 @@ class KnowledgeBaseManager:
         return job_id
     
     def _wait_for_ingestion_job(self, kb_id: str, ds_id: str, job_id: str, 
-                               max_wait: int = 600):
-        """Wait for ingestion job to complete"""
+                               max_wait: int = 600, max_delay: float = 30.0):
+        """Wait for ingestion job to complete, polling with capped exponential backoff"""
         start_time = time.time()
+        delay = 1.0
         
         while time.time() - start_time < max_wait:
             response = self.bedrock_agent.get_ingestion_job(
@@ -161,7 +176,11 @@ class KnowledgeBaseManager:
             elif status == 'FAILED':
                 raise Exception(f"Ingestion job failed: {response['ingestionJob']}")
             
-            time.sleep(10)
+            # Small jobs finish within a couple of polls; long ones back off to
+            # max_delay. Jitter keeps concurrent waiters from polling in lockstep
+            remaining = max_wait - (time.time() - start_time)
+            time.sleep(max(0.0, min(delay + random.uniform(0, delay * 0.1), remaining)))
+            delay = min(delay * 2, max_delay)
         
         raise TimeoutError(f"Ingestion job did not complete within {max_wait} seconds")
     
@@ -194,6 +213,23 @@ class KnowledgeBaseManager:
         
         return results
     
+    def retrieve_many(self,
+                      knowledge_base_id: str,
+                      queries: List[str],
+                      max_results: int = 5,
+                      search_type: str = "HYBRID",
+                      concurrency: int = 8) -> List[List[Dict]]:
+        """Retrieve documents for several queries concurrently, in query order"""
+        # There is no batch Retrieve endpoint, so overlap the requests on the shared
+        # (thread-safe) client; wall time becomes the slowest query, not the sum
+        if not queries:
+            return []
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(queries))) as executor:
+            return list(executor.map(
+                lambda query: self.retrieve(knowledge_base_id, query, max_results, search_type),
+                queries
+            ))
+    
     def retrieve_and_generate(self,
                             knowledge_base_id: str,
                             query: str,
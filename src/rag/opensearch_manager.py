@@ -1,8 +1,32 @@
 # OpenSearch vector store management
 import boto3
 import json
+import random
 import time
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional
+
+try:
+    from requests_aws4auth import AWS4Auth
+except ImportError:
+    AWS4Auth = None
+
+
+@lru_cache(maxsize=1)
+def _http_session():
+    """Shared HTTP session so AOSS requests reuse pooled TLS connections"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 503])
+    ))
+    return session
 
 
 class OpenSearchManager:
@@ -12,13 +36,18 @@ class OpenSearchManager:
         self.region = region_name
         self.session = boto3.Session(region_name=region_name)
         self.oss_client = self.session.client('opensearchserverless')
-        self.sts_client = self.session.client('sts')
-        
+        # (frozen credentials, AWS4Auth) for AOSS requests
+        self._auth_cache = None
+
     def create_opensearch_policies(self, collection_name: str) -> Dict[str, str]:
         """Create encryption and network policies for OpenSearch collection"""
-        account_id = self.sts_client.get_caller_identity()['Account']
-        
-        # Create encryption policy
+        return {
+            'encryption_policy': self._create_encryption_policy(collection_name),
+            'network_policy': self._create_network_policy(collection_name)
+        }
+    
+    def _create_encryption_policy(self, collection_name: str) -> str:
+        """Create the encryption policy for a collection"""
         encryption_policy = {
             "Rules": [
                 {
@@ -34,8 +63,10 @@ class OpenSearchManager:
             type='encryption',
             policy=json.dumps(encryption_policy)
         )
-        
-        # Create network policy
+        return f'{collection_name}-encryption'
+    
+    def _create_network_policy(self, collection_name: str) -> str:
+        """Create the network policy for a collection"""
         network_policy = [{
             "Rules": [
                 {
@@ -55,11 +86,32 @@ class OpenSearchManager:
             type='network',
             policy=json.dumps(network_policy)
         )
+        return f'{collection_name}-network'
+    
+    def bootstrap(self, collection_name: str, principal_arns: List[str]) -> Dict[str, str]:
+        """Create policies, collection and data access policy with independent calls overlapped.
         
-        return {
-            'encryption_policy': f'{collection_name}-encryption',
-            'network_policy': f'{collection_name}-network'
-        }
+        The encryption, network and access policies only need the collection name, so
+        they are created concurrently; the collection itself waits for the first two.
+        """
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            encryption = executor.submit(self._create_encryption_policy, collection_name)
+            network = executor.submit(self._create_network_policy, collection_name)
+            access = executor.submit(self.create_opensearch_access_policy,
+                                     collection_name, principal_arns)
+            
+            # result() re-raises any policy creation error before the collection is created
+            policies = {
+                'encryption_policy': encryption.result(),
+                'network_policy': network.result()
+            }
+            endpoint = self.create_opensearch_collection(collection_name)
+            
+            return {
+                **policies,
+                'access_policy': access.result(),
+                'collection_endpoint': endpoint
+            }
     
     def create_opensearch_collection(self, collection_name: str) -> str:
         """Create OpenSearch Serverless collection"""
@@ -72,15 +124,10 @@ class OpenSearchManager:
             
             collection_id = response['createCollectionDetail']['id']
             
-            # Wait for collection to be active
-            self.wait_for_collection_active(collection_id)
-            
-            # Get collection endpoint
-            collection_details = self.oss_client.batch_get_collection(
-                ids=[collection_id]
-            )
+            # Wait for collection to be active; the final poll already carries the endpoint
+            details = self.wait_for_collections_active([collection_id])
             
-            return collection_details['collectionDetails'][0]['collectionEndpoint']
+            return details[collection_id]['collectionEndpoint']
             
         except self.oss_client.exceptions.ConflictException:
             # Collection already exists
@@ -96,35 +143,63 @@ class OpenSearchManager:
     
     def wait_for_collection_active(self, collection_id: str, max_wait: int = 600):
         """Wait for OpenSearch collection to become active"""
+        self.wait_for_collections_active([collection_id], max_wait)
+        return True
+    
+    def wait_for_collections_active(self, collection_ids: List[str], max_wait: int = 600,
+                                    max_delay: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        """Wait for several collections with one batch_get_collection call per poll.
+        
+        opensearchserverless has no boto3 waiter, so poll with capped exponential
+        backoff plus jitter. Returns the collection details keyed by id.
+        """
         start_time = time.time()
+        pending = list(collection_ids)
+        active = {}
+        attempt = 0
         
         while time.time() - start_time < max_wait:
-            response = self.oss_client.batch_get_collection(ids=[collection_id])
-            if response['collectionDetails']:
-                status = response['collectionDetails'][0]['status']
+            response = self.oss_client.batch_get_collection(ids=pending)
+            for detail in response['collectionDetails']:
+                status = detail['status']
                 if status == 'ACTIVE':
-                    return True
+                    active[detail['id']] = detail
                 elif status == 'FAILED':
-                    raise Exception(f"Collection creation failed")
+                    raise Exception(f"Collection creation failed: {detail['id']}")
             
-            time.sleep(10)
+            pending = [collection_id for collection_id in pending if collection_id not in active]
+            if not pending:
+                return active
+            
+            remaining = max_wait - (time.time() - start_time)
+            time.sleep(max(0.0, min(2 ** attempt + random.uniform(0, 1), max_delay, remaining)))
+            attempt += 1
+        
+        raise TimeoutError(f"Collections {pending} did not become active within {max_wait} seconds")
+    
+    def _aws_auth(self):
+        """SigV4 auth for AOSS, rebuilt only when the session's credentials change"""
+        if AWS4Auth is None:
+            raise ImportError("requests-aws4auth is required: pip install requests-aws4auth")
         
-        raise TimeoutError(f"Collection did not become active within {max_wait} seconds")
+        # Frozen credentials only trigger a refresh when they are close to expiry
+        credentials = self.session.get_credentials().get_frozen_credentials()
+        cached = self._auth_cache
+        if cached is None or cached[0] != credentials:
+            awsauth = AWS4Auth(
+                credentials.access_key,
+                credentials.secret_key,
+                self.region,
+                'aoss',
+                session_token=credentials.token
+            )
+            cached = self._auth_cache = (credentials, awsauth)
+        return cached[1]
     
     def create_opensearch_index(self, collection_endpoint: str, index_name: str, 
                                embedding_dimension: int = 1536) -> bool:
         """Create index in OpenSearch collection"""
-        import requests
-        from requests_aws4auth import AWS4Auth
-        
-        credentials = self.session.get_credentials()
-        awsauth = AWS4Auth(
-            credentials.access_key,
-            credentials.secret_key,
-            self.region,
-            'aoss',
-            session_token=credentials.token
-        )
+        awsauth = self._aws_auth()
         
         index_body = {
             "mappings": {
@@ -150,20 +225,75 @@ class OpenSearchManager:
             }
         }
         
-        response = requests.put(
+        response = _http_session().put(
             f"{collection_endpoint}/{index_name}",
             auth=awsauth,
             json=index_body,
-            headers={"Content-Type": "application/json"}
+            headers={"Content-Type": "application/json"},
+            timeout=(5, 30)
         )
         
         return response.status_code == 200
     
+    def bulk_index(self, collection_endpoint: str, index_name: str,
+                   documents: Iterable[Dict[str, Any]], chunk_size: int = 500,
+                   max_chunk_bytes: int = 10 * 1024 * 1024,
+                   max_retries: int = 3) -> Dict[str, int]:
+        """Index documents through the _bulk API instead of one request per document.
+        
+        Documents are dicts with 'text', 'embedding' and optional 'metadata'; they are
+        consumed lazily and sent in batches capped by count and by payload size, so
+        memory stays bounded for generators over large corpora. A batch rejected with
+        429 or 503 is resent up to ``max_retries`` times with exponential backoff.
+        """
+        awsauth = self._aws_auth()
+        action = json.dumps({"index": {"_index": index_name}}).encode() + b"\n"
+        counts = {'indexed': 0, 'errors': 0}
+        
+        def flush(lines):
+            body = b"".join(lines)
+            # The session's Retry never resends a POST, so back off here instead; a
+            # batch rejected as a whole indexed nothing and is safe to send again
+            for attempt in range(max_retries + 1):
+                response = _http_session().post(
+                    f"{collection_endpoint}/_bulk",
+                    auth=awsauth,
+                    data=body,
+                    headers={"Content-Type": "application/x-ndjson"},
+                    timeout=(5, 120)
+                )
+                if response.status_code not in (429, 503) or attempt == max_retries:
+                    break
+                time.sleep(0.5 * 2 ** attempt + random.uniform(0, 0.5))
+            response.raise_for_status()
+            for item in response.json()['items']:
+                counts['errors' if 'error' in item['index'] else 'indexed'] += 1
+        
+        lines = []
+        batch_bytes = 0
+        for document in documents:
+            embedding = document['embedding']
+            source = json.dumps({
+                "text": document['text'],
+                "embedding": embedding.tolist() if hasattr(embedding, 'tolist') else embedding,
+                "metadata": document.get('metadata', {})
+            }).encode() + b"\n"
+            
+            size = len(action) + len(source)
+            if lines and (len(lines) // 2 >= chunk_size or batch_bytes + size > max_chunk_bytes):
+                flush(lines)
+                lines = []
+                batch_bytes = 0
+            lines += (action, source)
+            batch_bytes += size
+        
+        if lines:
+            flush(lines)
+        return counts
+    
     def create_opensearch_access_policy(self, collection_name: str, 
                                        principal_arns: List[str]) -> str:
         """Create data access policy for OpenSearch collection"""
-        account_id = self.sts_client.get_caller_identity()['Account']
-        
         access_policy = [{
             "Rules": [
                 {
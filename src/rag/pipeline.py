@@ -1,19 +1,24 @@
 """Main RAG pipeline implementation."""
 
-import json
 import logging
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any
 
 import click
 
-from ..utils.aws_client import get_bedrock_runtime_client
+from ..utils.aws_client import RateLimitedClient, TokenBucket, get_bedrock_runtime_client
 from .chunking import SimpleChunker
 from .embeddings import EmbeddingGenerator
 from .vector_store import FAISSVectorStore
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = (
+    "Based on the context provided, please give a comprehensive answer to the question."
+)
+
 
 @dataclass
 class RAGConfig:
@@ -24,6 +29,14 @@ class RAGConfig:
     embedding_model: str = "all-MiniLM-L6-v2"  # Use local model by default
     retrieval_k: int = 5
     rerank: bool = True
+    vector_quantization: str | None = None  # "pq": 8-bit product codes, >= 256 chunks
+    generation_model: str = "anthropic.claude-instant-v1"
+    # Mark the system + context prefix cacheable; needs a model with prompt caching
+    prompt_caching: bool = False
+    # Ceiling on Bedrock requests per second, shared by embedding and generation
+    bedrock_rps: float = 10.0
+    # Time a few local-model batch sizes on the first documents and keep the fastest
+    calibrate_batch_size: bool = False
 
 
 class RAGPipeline:
@@ -36,98 +49,166 @@ class RAGPipeline:
         )
         self.embedder = EmbeddingGenerator(
             model_name=config.embedding_model,
-            use_bedrock="titan" in config.embedding_model
+            use_bedrock=("titan" in config.embedding_model
+                         or config.embedding_model.startswith("cohere."))
+        )
+
+        # One bucket paces every Bedrock call so parallel embedding and generation
+        # stay under the account quota instead of tripping throttling retries
+        self.bedrock_limiter = TokenBucket(config.bedrock_rps)
+        self.embedder.rate_limiter = self.bedrock_limiter
+
+        # Size the vector store from the embedding model; a Bedrock model missing from
+        # the known-dimension table is probed with one embedding call
+        dimension = self.embedder.dimension
+        if dimension is None:
+            dimension = self.embedder.generate_one("dimension probe").shape[0]
+        self.vector_store = FAISSVectorStore(
+            dimension=dimension, quantize=config.vector_quantization
         )
-        # Initialize vector store with embedding dimension
-        dimension = 384 if "MiniLM" in config.embedding_model else 1536
-        self.vector_store = FAISSVectorStore(dimension=dimension)
         self.bedrock = None  # Lazy load when needed
+        self._calibrated = not config.calibrate_batch_size
 
     def process_documents(self, documents: list[str]) -> None:
         """Process and index documents."""
         logger.info(f"Processing {len(documents)} documents")
 
-        # Chunk documents
-        all_chunks = []
-        chunk_texts = []
+        # Chunk, embed and index in bounded mini-batches so memory stays O(batch)
+        # and vectors reach the store while later documents are still being chunked
+        total = 0
+        for chunk_texts, chunks in self._chunk_stream(documents):
+            if not self._calibrated:
+                # Calibrate once, on a sample of the real data
+                self.embedder.calibrate_batch_size(chunk_texts[:512])
+                self._calibrated = True
+            self._embed_and_add(chunk_texts, chunks)
+            total += len(chunks)
+
+        logger.info(f"Indexed {total} chunks")
+
+    def _chunk_stream(self, documents: list[str], target_chars: int = 150_000,
+                      target_items: int = 4000) -> Iterator[tuple[list[str], list[dict]]]:
+        """Yield (texts, chunks) batches of at most target_items / about target_chars."""
+        chunk_texts: list[str] = []
+        chunks: list[dict] = []
+        chars = 0
         for doc in documents:
-            chunks = self.chunker.chunk_text(doc)
-            for chunk in chunks:
-                all_chunks.append(chunk)
+            for chunk in self.chunker.chunk_text(doc):
+                chunks.append(chunk)
                 chunk_texts.append(chunk['text'])
-
-        # Generate embeddings
-        embeddings = self.embedder.generate(chunk_texts)
+                chars += len(chunk['text'])
+                if len(chunks) >= target_items or chars >= target_chars:
+                    yield chunk_texts, chunks
+                    chunk_texts, chunks, chars = [], [], 0
+        if chunks:
+            yield chunk_texts, chunks
+
+    def _embed_and_add(self, chunk_texts: list[str], chunks: list[dict]) -> None:
+        """Embed one batch and store it, halving the batch if the embedder runs out of memory."""
+        try:
+            embeddings = self.embedder.generate(chunk_texts)
+        except (MemoryError, RuntimeError) as e:
+            # torch.cuda.OutOfMemoryError (and the MPS equivalent) is a RuntimeError
+            # rather than a MemoryError; any other RuntimeError is a real failure
+            if isinstance(e, RuntimeError) and "out of memory" not in str(e).lower():
+                raise
+            if len(chunk_texts) <= 1:
+                raise
+            half = len(chunk_texts) // 2
+            logger.warning(f"Out of memory embedding {len(chunk_texts)} chunks; splitting batch")
+            self._embed_and_add(chunk_texts[:half], chunks[:half])
+            self._embed_and_add(chunk_texts[half:], chunks[half:])
+            return
 
         # Store in vector database
         self.vector_store.add(
             embeddings=embeddings,
             documents=chunk_texts,
-            metadata=all_chunks
+            metadata=chunks
         )
 
-        logger.info(f"Indexed {len(all_chunks)} chunks")
-
     def query(self, question: str) -> dict[str, Any]:
         """Query the RAG system."""
-        logger.info(f"Querying: {question}")
+        return self.query_batch([question])[0]
 
-        # Generate query embedding
-        query_embedding = self.embedder.generate(question)
+    def query_batch(self, questions: list[str]) -> list[dict[str, Any]]:
+        """Query the RAG system with several questions (e.g. decomposed sub-queries).
 
-        # Retrieve relevant chunks
-        results = self.vector_store.search(
-            query_embedding=query_embedding[0],
-            k=self.config.retrieval_k
-        )
+        All questions are embedded in one call and retrieved with one batched index
+        search; the Bedrock generations then run concurrently.
+        """
+        logger.info(f"Querying: {questions}")
+        if not questions:
+            return []
 
-        # Extract documents
-        relevant_chunks = [r['document'] for r in results]
+        # Generate query embeddings
+        query_embeddings = self.embedder.generate(questions, input_type="search_query")
 
-        # Build context
-        context = "\n\n".join(relevant_chunks)
-
-        # Generate response using Bedrock
-        response = self._generate_response(question, context)
+        # Retrieve relevant chunks for every question at once
+        batch_results = self.vector_store.search_batch(
+            query_embeddings=query_embeddings,
+            k=self.config.retrieval_k
+        )
 
-        return {
-            "question": question,
-            "answer": response,
-            "sources": relevant_chunks,
-            "scores": [r['score'] for r in results],
-            "metadata": {
-                "chunks_used": len(relevant_chunks),
-                "model": self.config.embedding_model
-            },
-        }
+        # Extract documents and build each context
+        sources = [[r['document'] for r in results] for results in batch_results]
+        contexts = ["\n\n".join(relevant_chunks) for relevant_chunks in sources]
+
+        # Generate responses using Bedrock
+        if len(questions) == 1:
+            responses = [self._generate_response(questions[0], contexts[0])]
+        else:
+            if self.bedrock is None:
+                self.bedrock = self._bedrock_client()
+            with ThreadPoolExecutor(max_workers=min(8, len(questions))) as executor:
+                responses = list(executor.map(self._generate_response, questions, contexts))
+
+        return [
+            {
+                "question": question,
+                "answer": response,
+                "sources": relevant_chunks,
+                "scores": [r['score'] for r in results],
+                "metadata": {
+                    "chunks_used": len(relevant_chunks),
+                    "model": self.config.embedding_model
+                },
+            }
+            for question, response, relevant_chunks, results
+            in zip(questions, responses, sources, batch_results, strict=True)
+        ]
+
+    def _bedrock_client(self) -> RateLimitedClient:
+        """Bedrock runtime client paced by the pipeline's token bucket."""
+        return RateLimitedClient(get_bedrock_runtime_client(rate_limited=True),
+                                 self.bedrock_limiter)
 
     def _generate_response(self, question: str, context: str) -> str:
         """Generate response using Bedrock."""
         if self.bedrock is None:
-            self.bedrock = get_bedrock_runtime_client()
-
-        prompt = f"""Context information:
-{context}
-
-Question: {question}
-
-Based on the context above, please provide a comprehensive answer to the question."""
+            self.bedrock = self._bedrock_client()
+
+        # The Converse API handles the chat framing. The fixed instructions live in the
+        # system block and the question comes last, so with prompt caching on, the
+        # system + context prefix can be served from Bedrock's prompt cache
+        system = [{"text": SYSTEM_PROMPT}]
+        content = [{"text": f"Context information:\n{context}"}]
+        if self.config.prompt_caching:
+            system.append({"cachePoint": {"type": "default"}})
+            content.append({"cachePoint": {"type": "default"}})
+        content.append({"text": f"Question: {question}"})
 
         try:
-            # Example for Claude model
-            body = json.dumps({
-                "prompt": f"\n\nHuman: {prompt}\n\nAssistant:",
-                "max_tokens_to_sample": 500,
-                "temperature": 0.7
-            })
-
-            response = self.bedrock.invoke_model(
-                modelId="anthropic.claude-instant-v1",
-                body=body
+            response = self.bedrock.converse(
+                modelId=self.config.generation_model,
+                system=system,
+                messages=[{"role": "user", "content": content}],
+                inferenceConfig={"maxTokens": 500, "temperature": 0.7}
             )
-
-            result = json.loads(response['body'].read())
-            return result.get('completion', 'Unable to generate response')
+            for block in response['output']['message']['content']:
+                if 'text' in block:
+                    return block['text']
+            return 'Unable to generate response'
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             return f"Error: {e!s}"
@@ -150,10 +231,10 @@ def process(source: str, chunks: int):
     # Load document
     if source.endswith('.pdf'):
         from ..utils.pdf_extractor import PDFExtractor
-        extractor = PDFExtractor()
         # Extract limited pages to avoid processing whole PDF
         max_pages = chunks // 10  # Roughly 10 chunks per page
-        text = extractor.extract_text(source, max_pages=max_pages)
+        with PDFExtractor() as extractor:
+            text = extractor.extract_text(source, max_pages=max_pages)
     else:
         with open(source) as f:
             text = f.read()
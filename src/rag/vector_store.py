@@ -10,17 +10,96 @@ from typing import Any
 import faiss
 import numpy as np
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 logger = logging.getLogger(__name__)
 
 
 class FAISSVectorStore:
     """FAISS-based vector store for similarity search."""
 
-    def __init__(self, dimension: int):
+    INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+    METRICS = ("cosine", "l2")
+    # Product quantizers use 8-bit codes, i.e. 256 centroids per sub-quantizer
+    PQ_CENTROIDS = 256
+    # FAISS wants about this many training points per centroid for stable k-means
+    TRAINING_POINTS_PER_CENTROID = 39
+
+    def __init__(self, dimension: int, index_type: str = "flat",
+                 hnsw_m: int = 32, ivf_nlist: int = 1024, metric: str = "cosine",
+                 quantize: str | None = None):
+        """Create an empty store.
+
+        ``flat`` scans every vector and is fastest below ~10k vectors. ``hnsw`` searches
+        a graph in roughly O(log N); ``ivfpq`` compresses vectors for >1M-vector corpora.
+
+        With the ``cosine`` metric vectors are L2-normalized on the way in and searched
+        by inner product, so ``score`` is the cosine similarity; ``l2`` keeps raw
+        Euclidean distances.
+
+        ``quantize="pq"`` stores a flat index as 8-bit product codes, one byte per four
+        dimensions (16x less memory than float32).
+
+        Quantized indexes (``ivfpq`` and ``pq``) need training. Vectors passed to
+        ``add`` are buffered until enough have arrived for a good training sample, or
+        until the first ``search``/``save``; training then uses everything buffered.
+        Fewer vectors than centroids (256, or ``ivf_nlist`` for ``ivfpq``) cannot be
+        trained and raise a ValueError at that point.
+        """
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}; expected one of "
+                             f"{self.INDEX_TYPES}")
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {self.METRICS}")
+        if quantize not in (None, "pq"):
+            raise ValueError(f"Unknown quantization {quantize!r}; expected None or 'pq'")
+        if quantize and index_type != "flat":
+            raise ValueError("quantize='pq' applies to the flat index; use index_type='ivfpq'")
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)
-        self.documents = []
-        self.metadata = []
+        self.index_type = index_type
+        self.metric = metric
+        self.quantize = quantize
+        self.hnsw_m = hnsw_m
+        self.ivf_nlist = ivf_nlist
+        self.index = self._build_index()
+        self.documents: list[str] = []
+        self.metadata: list[dict] = []
+        # Prepared vectors waiting for a quantized index to be trained
+        self._pending: list[np.ndarray] = []
+        self._pending_rows = 0
+
+    def _build_index(self):
+        """Build an empty FAISS index of the configured type and metric."""
+        cosine = self.metric == "cosine"
+        faiss_metric = faiss.METRIC_INNER_PRODUCT if cosine else faiss.METRIC_L2
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss_metric)
+            index.hnsw.efConstruction = 200
+            return index
+        # Four dimensions (16 bytes of float32) per 8-bit sub-quantizer: 16x smaller
+        pq_m = self.dimension // 4 if self.dimension % 4 == 0 else self.dimension
+        if self.index_type == "ivfpq":
+            # The coarse quantizer must outlive the IVF index that points at it
+            self._quantizer = (faiss.IndexFlatIP(self.dimension) if cosine
+                               else faiss.IndexFlatL2(self.dimension))
+            return faiss.IndexIVFPQ(self._quantizer, self.dimension, self.ivf_nlist, pq_m, 8,
+                                    faiss_metric)
+        if self.quantize == "pq":
+            return faiss.IndexPQ(self.dimension, pq_m, 8, faiss_metric)
+        return faiss.IndexFlatIP(self.dimension) if cosine else faiss.IndexFlatL2(self.dimension)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """Return float32 C-contiguous vectors, unit-normalized for the cosine metric."""
+        if self.metric == "cosine":
+            # normalize_L2 works in place, so never hand it the caller's array
+            vectors = np.array(vectors, dtype='float32', order='C', copy=True)
+            faiss.normalize_L2(vectors)
+            return vectors
+        return np.ascontiguousarray(vectors, dtype='float32')
 
     def add(self, embeddings: np.ndarray, documents: list[str],
             metadata: list[dict] | None = None):
@@ -28,10 +107,18 @@ class FAISSVectorStore:
         if embeddings.shape[1] != self.dimension:
             raise ValueError(f"Embedding dimension {embeddings.shape[1]} != {self.dimension}")
 
-        # Add to FAISS index
-        self.index.add(embeddings.astype('float32'))
+        # Add to FAISS index; a quantized index buffers vectors until it can be trained
+        embeddings = self._prepare(embeddings)
+        if self.index.is_trained:
+            self.index.add(embeddings)
+        else:
+            self._pending.append(embeddings)
+            self._pending_rows += len(embeddings)
+            if self._pending_rows >= self._training_sizes()[1]:
+                self._train_pending()
 
-        # Store documents and metadata
+        # Store documents and metadata; extending from a sized list grows each list
+        # to its new length in one reallocation per batch
         self.documents.extend(documents)
         if metadata:
             self.metadata.extend(metadata)
@@ -40,45 +127,109 @@ class FAISSVectorStore:
 
         logger.info(f"Added {len(documents)} documents to vector store")
 
+    def _training_sizes(self) -> tuple[int, int]:
+        """Return the (minimum, preferred) number of vectors to train the index on."""
+        centroids = self.PQ_CENTROIDS
+        if self.index_type == "ivfpq":
+            centroids = max(centroids, self.ivf_nlist)
+        return centroids, centroids * self.TRAINING_POINTS_PER_CENTROID
+
+    def _train_pending(self) -> None:
+        """Train the quantized index on the buffered vectors, then add them."""
+        if not self._pending:
+            return
+        minimum = self._training_sizes()[0]
+        if self._pending_rows < minimum:
+            kind = "IVF-PQ" if self.index_type == "ivfpq" else "PQ"
+            raise ValueError(f"The {kind} index needs at least {minimum} vectors to train, "
+                             f"but only {self._pending_rows} have been added")
+        vectors = np.concatenate(self._pending)
+        self._pending, self._pending_rows = [], 0
+        self.index.train(vectors)
+        self.index.add(vectors)
+
     def search(self, query_embedding: np.ndarray, k: int = 5) -> list[dict[str, Any]]:
         """Search for k most similar documents."""
-        query_embedding = query_embedding.reshape(1, -1).astype('float32')
-        distances, indices = self.index.search(query_embedding, k)
-
-        results = []
-        for i, (idx, dist) in enumerate(zip(indices[0], distances[0], strict=False)):
-            if idx < len(self.documents):
-                results.append({
-                    'index': int(idx),
-                    'distance': float(dist),
-                    'document': self.documents[idx],
-                    'metadata': self.metadata[idx],
-                    'score': float(1 / (1 + dist))  # Convert distance to score
-                })
-
-        return results
+        return self.search_batch(query_embedding.reshape(1, -1), k)[0]
+
+    def search_batch(self, query_embeddings: np.ndarray,
+                     k: int = 5) -> list[list[dict[str, Any]]]:
+        """Search for the k most similar documents to each row of a (n, d) query matrix."""
+        self._train_pending()
+        query_embeddings = self._prepare(query_embeddings)
+        if self.index_type == "hnsw":
+            self.index.hnsw.efSearch = max(64, k * 4)
+        elif self.index_type == "ivfpq":
+            self.index.nprobe = min(self.ivf_nlist, max(8, k))
+        distances, indices = self.index.search(query_embeddings, k)
+
+        # Inner product of unit vectors is already the cosine similarity
+        if self.metric == "cosine":
+            scores, distances = distances, 1 - distances
+        else:
+            scores = 1 / (1 + distances)  # Convert distance to score
+
+        batch_results = []
+        for row_indices, row_distances, row_scores in zip(indices, distances, scores,
+                                                          strict=True):
+            results = []
+            for idx, dist, score in zip(row_indices, row_distances, row_scores, strict=True):
+                if 0 <= idx < len(self.documents):
+                    results.append({
+                        'index': int(idx),
+                        'distance': float(dist),
+                        'document': self.documents[idx],
+                        'metadata': self.metadata[idx],
+                        'score': float(score)
+                    })
+            batch_results.append(results)
+
+        return batch_results
 
     def save(self, path: str):
         """Save vector store to disk."""
         path = Path(path)
         path.mkdir(parents=True, exist_ok=True)
+        self._train_pending()
 
         # Save FAISS index
         faiss.write_index(self.index, str(path / "index.faiss"))
 
-        # Save documents and metadata
+        # Save documents and metadata. With pyarrow they go to a zstd-compressed
+        # columnar Parquet file and the pickle only keeps the store settings
+        columnar = pq is not None
+        if columnar:
+            table = pa.Table.from_pydict({
+                'document': self.documents,
+                'metadata_json': [json.dumps(m, default=str) for m in self.metadata]
+            })
+            pq.write_table(table, path / "documents.parquet", compression='zstd')
+
         with open(path / "documents.pkl", 'wb') as f:
             pickle.dump({
-                'documents': self.documents,
-                'metadata': self.metadata,
-                'dimension': self.dimension
+                'documents': None if columnar else self.documents,
+                'metadata': None if columnar else self.metadata,
+                'dimension': self.dimension,
+                'index_type': self.index_type,
+                'hnsw_m': self.hnsw_m,
+                'ivf_nlist': self.ivf_nlist,
+                'metric': self.metric,
+                'quantize': self.quantize
             }, f)
 
         logger.info(f"Saved vector store to {path}")
 
     @classmethod
-    def load(cls, path: str) -> 'FAISSVectorStore':
-        """Load vector store from disk."""
+    def load(cls, path: str, mmap: bool = False) -> 'FAISSVectorStore':
+        """Load vector store from disk.
+
+        With ``mmap=True`` the index is opened read-only and FAISS memory-maps what
+        it can instead of reading it into RAM, leaving the working set to the OS page
+        cache. That covers the inverted lists of ``ivfpq`` indexes; the flat codes
+        behind ``flat``, ``pq`` and the HNSW vectors are mapped only on FAISS builds
+        with ``IO_FLAG_MMAP_IFC`` and are otherwise read into memory, as is the HNSW
+        graph. Such a store cannot be added to.
+        """
         path = Path(path)
 
         # Load documents and metadata
@@ -86,25 +237,46 @@ class FAISSVectorStore:
             data = pickle.load(f)
 
         # Create instance
-        store = cls(data['dimension'])
-        store.documents = data['documents']
-        store.metadata = data['metadata']
+        store = cls(data['dimension'], index_type=data.get('index_type', 'flat'),
+                    hnsw_m=data.get('hnsw_m', 32), ivf_nlist=data.get('ivf_nlist', 1024),
+                    # Stores saved before the metric was recorded hold L2 indexes
+                    metric=data.get('metric', 'l2'), quantize=data.get('quantize'))
+        if data['documents'] is None:
+            if pq is None:
+                raise ImportError("pyarrow is required to load documents.parquet")
+            table = pq.read_table(path / "documents.parquet", memory_map=True)
+            store.documents = table.column('document').to_pylist()
+            store.metadata = [json.loads(m) for m in table.column('metadata_json').to_pylist()]
+        else:
+            store.documents = data['documents']
+            store.metadata = data['metadata']
 
         # Load FAISS index
-        store.index = faiss.read_index(str(path / "index.faiss"))
+        io_flags = 0
+        if mmap:
+            # IO_FLAG_MMAP alone leaves IndexFlat codes in RAM; newer FAISS maps them too
+            io_flags = (faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                        | getattr(faiss, 'IO_FLAG_MMAP_IFC', 0))
+        store.index = faiss.read_index(str(path / "index.faiss"), io_flags)
 
         logger.info(f"Loaded vector store from {path}")
         return store
 
+    @classmethod
+    def load_mmap(cls, path: str) -> 'FAISSVectorStore':
+        """Load vector store from disk with the index memory-mapped (see ``load``)."""
+        return cls.load(path, mmap=True)
+
     def clear(self):
         """Clear the vector store."""
-        self.index = faiss.IndexFlatL2(self.dimension)
+        self.index = self._build_index()
         self.documents = []
         self.metadata = []
+        self._pending, self._pending_rows = [], 0
 
     def size(self) -> int:
         """Return number of vectors in the store."""
-        return self.index.ntotal
+        return self.index.ntotal + self._pending_rows
 
 
 class DynamoDBVectorMetadata:
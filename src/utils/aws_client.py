@@ -1,10 +1,32 @@
 """AWS client configuration for LocalStack and production environments."""
 
 import os
-from functools import cache
+import threading
+import time
 from typing import Any
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.retries.standard import RetryEventAdapter, ThrottlingErrorDetector
+
+# Sized for the thread pools that fan out Bedrock/S3 calls: enough pooled connections
+# to avoid TLS re-handshakes, and adaptive retries to ride out throttling
+DEFAULT_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    tcp_keepalive=True,
+)
+
+# For clients wrapped in RateLimitedClient: standard rather than adaptive retries, as
+# the token bucket does the client-side rate limiting. Throttling errors are excluded
+# from these retries by _skip_throttling_retries, since the bucket retries those itself
+RATE_LIMITED_CLIENT_CONFIG = Config(retries={"max_attempts": 3, "mode": "standard"})
+
+# boto3's default session is not safe to build clients from concurrently
+_session_lock = threading.Lock()
+_clients: dict[tuple[str, bool], Any] = {}
+_clients_lock = threading.Lock()
 
 
 def get_aws_client(service_name: str, **kwargs) -> Any:
@@ -20,29 +42,151 @@ def get_aws_client(service_name: str, **kwargs) -> Any:
         config["aws_access_key_id"] = os.getenv("AWS_ACCESS_KEY_ID", "test")
         config["aws_secret_access_key"] = os.getenv("AWS_SECRET_ACCESS_KEY", "test")
 
+    # Caller-supplied botocore settings override the defaults field by field
+    client_config = kwargs.pop("config", None)
+    config["config"] = (DEFAULT_CLIENT_CONFIG.merge(client_config) if client_config
+                        else DEFAULT_CLIENT_CONFIG)
+
     config.update(kwargs)
-    return boto3.client(service_name, **config)
+    with _session_lock:
+        return boto3.client(service_name, **config)
+
+
+def _cached_client(service_name: str, rate_limited: bool = False) -> Any:
+    """Return the shared client for a service, creating it exactly once across threads."""
+    key = (service_name, rate_limited)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                kwargs = {"config": RATE_LIMITED_CLIENT_CONFIG} if rate_limited else {}
+                client = get_aws_client(service_name, **kwargs)
+                if rate_limited:
+                    _skip_throttling_retries(client)
+                _clients[key] = client
+    return client
+
 
+def _skip_throttling_retries(client: Any) -> None:
+    """Stop botocore retrying throttling errors, keeping its retries for everything else.
 
-@cache
-def get_bedrock_runtime_client():
-    """Get Bedrock runtime client."""
-    return get_aws_client("bedrock-runtime")
+    The handler runs ahead of botocore's own ``needs-retry`` handler, and a False
+    response from it means "do not retry".
+    """
+    detector = ThrottlingErrorDetector(RetryEventAdapter())
+
+    def needs_retry(**kwargs):
+        if detector.is_throttling_error(**kwargs):
+            return False
+        return None
+
+    service_event_name = client.meta.service_model.service_id.hyphenize()
+    client.meta.events.register_first(f"needs-retry.{service_event_name}", needs_retry)
+
+
+def get_bedrock_runtime_client(rate_limited: bool = False):
+    """Get Bedrock runtime client.
+
+    ``rate_limited`` returns a client whose botocore retries skip throttling errors,
+    for wrapping in RateLimitedClient, which handles throttling itself.
+    """
+    return _cached_client("bedrock-runtime", rate_limited)
 
 
-@cache
 def get_s3_client():
     """Get S3 client."""
-    return get_aws_client("s3")
+    return _cached_client("s3")
 
 
-@cache
 def get_dynamodb_client():
     """Get DynamoDB client."""
-    return get_aws_client("dynamodb")
+    return _cached_client("dynamodb")
 
 
-@cache
 def get_sagemaker_client():
     """Get SageMaker client."""
-    return get_aws_client("sagemaker")
+    return _cached_client("sagemaker")
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to throttling.
+
+    The rate is halved whenever the service throttles and creeps back up by 5% of
+    the ceiling per successful call, so sustained load settles just under the quota.
+    """
+
+    def __init__(self, rate: float, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self._capacity = max(1.0, rate)
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Reserve the token now; a negative balance is the queue ahead of us
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Drop any burst allowance so the next call waits at least one interval
+            self._tokens = min(self._tokens, 0.0)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class RateLimitedClient:
+    """Proxy for a boto3 client that draws from a TokenBucket before selected calls.
+
+    A throttled call slows the bucket down and is retried through it, up to
+    ``max_retries`` times; build the wrapped client with
+    ``get_bedrock_runtime_client(rate_limited=True)`` so botocore does not retry
+    throttled calls too.
+    """
+
+    THROTTLING_CODES = frozenset({"ThrottlingException", "TooManyRequestsException"})
+
+    def __init__(self, client: Any, bucket: TokenBucket,
+                 methods: tuple[str, ...] = ("invoke_model", "converse"),
+                 max_retries: int = 5):
+        self._client = client
+        self._bucket = bucket
+        self._methods = frozenset(methods)
+        self.max_retries = max_retries
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in self._methods:
+            return attr
+
+        def call(*args, **kwargs):
+            for attempt in range(self.max_retries + 1):
+                self._bucket.acquire()
+                try:
+                    result = attr(*args, **kwargs)
+                except ClientError as e:
+                    code = e.response.get("Error", {}).get("Code")
+                    if code not in self.THROTTLING_CODES:
+                        raise
+                    # The slowed-down bucket is the backoff before the retry
+                    self._bucket.on_throttle()
+                    if attempt == self.max_retries:
+                        raise
+                    continue
+                self._bucket.on_success()
+                return result
+
+        return call
@@ -1,12 +1,19 @@
 """Cost calculator for AWS GenAI services."""
 
+import time
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from types import MappingProxyType
 
+import numpy as np
 import pandas as pd
+from dateutil.tz import tzlocal
 
 
-@dataclass
+@dataclass(slots=True)
 class ModelPricing:
     """Pricing information for a model."""
 
@@ -48,31 +55,55 @@ class AWSCostCalculator:
         ),
     }
 
+    # (input, output) price per single token, derived once from the table above;
+    # read-only, and plain tuples so lookups skip the dataclass attribute access
+    _PRICE_PER_TOKEN = MappingProxyType({
+        model_id: (
+            pricing.input_price_per_1k_tokens / 1000,
+            pricing.output_price_per_1k_tokens / 1000,
+        )
+        for model_id, pricing in BEDROCK_PRICING.items()
+    })
+
+    # Lengths of the sample question ("What is the meaning of life?" * 10) and answer
+    # ("The meaning of life is..." * 50) priced per query in estimate_rag_costs
+    SAMPLE_QUERY_CHARS = 280  # ~70 tokens
+    SAMPLE_ANSWER_CHARS = 1250  # ~312 tokens
+
     # Storage pricing
     S3_STORAGE_PRICE_PER_GB = 0.023  # Standard storage
     S3_REQUEST_PRICE = {"PUT": 0.005 / 1000, "GET": 0.0004 / 1000}  # per request  # per request
 
     def __init__(self):
         self.usage_history = []
+        # Epoch nanoseconds of usage_history as a packed column, kept non-decreasing
+        # for bisecting by date and handed to pandas without per-row objects
+        self._timestamps = array('q')
 
     def estimate_tokens(self, text: str) -> int:
         """Estimate token count for text (rough approximation)."""
         # Rough estimate: ~4 characters per token
-        return len(text) // 4
+        return len(text) >> 2
+
+    def estimate_tokens_batch(self, texts: list[str]) -> int:
+        """Estimate the total token count for several texts in one pass."""
+        # One builtin length reduction instead of a method call per text
+        return sum(map(len, texts)) >> 2
 
     def calculate_llm_cost(
         self, model_id: str, input_text: str, output_text: str
     ) -> dict[str, float]:
         """Calculate cost for LLM usage."""
-        if model_id not in self.BEDROCK_PRICING:
+        prices = self._PRICE_PER_TOKEN.get(model_id)
+        if prices is None:
             raise ValueError(f"Unknown model: {model_id}")
 
-        pricing = self.BEDROCK_PRICING[model_id]
-        input_tokens = self.estimate_tokens(input_text)
-        output_tokens = self.estimate_tokens(output_text)
+        input_price, output_price = prices
+        input_tokens = len(input_text) >> 2
+        output_tokens = len(output_text) >> 2
 
-        input_cost = (input_tokens / 1000) * pricing.input_price_per_1k_tokens
-        output_cost = (output_tokens / 1000) * pricing.output_price_per_1k_tokens
+        input_cost = input_tokens * input_price
+        output_cost = output_tokens * output_price
 
         return {
             "model_id": model_id,
@@ -85,13 +116,13 @@ class AWSCostCalculator:
 
     def calculate_embedding_cost(self, model_id: str, texts: list[str]) -> dict[str, float]:
         """Calculate cost for embedding generation."""
-        if model_id not in self.BEDROCK_PRICING:
+        prices = self._PRICE_PER_TOKEN.get(model_id)
+        if prices is None:
             raise ValueError(f"Unknown embedding model: {model_id}")
 
-        pricing = self.BEDROCK_PRICING[model_id]
-        total_tokens = sum(self.estimate_tokens(text) for text in texts)
+        total_tokens = self.estimate_tokens_batch(texts)
 
-        cost = (total_tokens / 1000) * pricing.input_price_per_1k_tokens
+        cost = total_tokens * prices[0]
 
         return {
             "model_id": model_id,
@@ -101,13 +132,19 @@ class AWSCostCalculator:
             "cost_per_text": cost / len(texts) if texts else 0,
         }
 
+    @staticmethod
+    def _query_cost(model_id: str, input_chars: int, output_chars: int) -> float:
+        """Total cost of one LLM call with the given text lengths."""
+        input_price, output_price = AWSCostCalculator._PRICE_PER_TOKEN[model_id]
+        return (input_chars >> 2) * input_price + (output_chars >> 2) * output_price
+
     def calculate_storage_cost(
         self, storage_gb: float, read_requests: int, write_requests: int, days: int = 30
     ) -> dict[str, float]:
         """Calculate S3 storage costs."""
-        storage_cost = storage_gb * self.S3_STORAGE_PRICE_PER_GB * (days / 30)
-        read_cost = read_requests * self.S3_REQUEST_PRICE["GET"]
-        write_cost = write_requests * self.S3_REQUEST_PRICE["PUT"]
+        storage_cost, read_cost, write_cost = self._storage_costs(
+            storage_gb, read_requests, write_requests, days
+        )
 
         return {
             "storage_gb": storage_gb,
@@ -119,73 +156,121 @@ class AWSCostCalculator:
             "total_cost": storage_cost + read_cost + write_cost,
         }
 
+    @staticmethod
+    def _storage_costs(storage_gb: float, read_requests: int, write_requests: int,
+                       days: int) -> tuple[float, float, float]:
+        """(storage, read, write) S3 costs."""
+        storage_cost = storage_gb * AWSCostCalculator.S3_STORAGE_PRICE_PER_GB * (days / 30)
+        read_cost = read_requests * AWSCostCalculator.S3_REQUEST_PRICE["GET"]
+        write_cost = write_requests * AWSCostCalculator.S3_REQUEST_PRICE["PUT"]
+        return storage_cost, read_cost, write_cost
+
     def track_usage(self, usage_data: dict):
         """Track usage for monitoring."""
-        usage_data["timestamp"] = datetime.now().isoformat()
+        timestamp_ns = time.time_ns()
+        # A wall-clock step backwards must not unsort the index
+        if self._timestamps and timestamp_ns < self._timestamps[-1]:
+            timestamp_ns = self._timestamps[-1]
+        # Each record keeps its own time for readers of usage_history, as a local ISO
+        # string and in nanoseconds; the packed column below is the sorted index the
+        # summary bisects
+        seconds, nanos = divmod(timestamp_ns, 10**9)
+        local_time = datetime.fromtimestamp(seconds) + timedelta(microseconds=nanos // 1000)
+        usage_data["timestamp"] = local_time.isoformat()
+        usage_data["timestamp_ns"] = timestamp_ns
         self.usage_history.append(usage_data)
+        self._timestamps.append(timestamp_ns)
 
     def get_usage_summary(self, days: int = 7) -> pd.DataFrame:
         """Get usage summary for the last N days."""
         if not self.usage_history:
             return pd.DataFrame()
 
-        df = pd.DataFrame(self.usage_history)
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-        # Filter to last N days
-        cutoff = datetime.now() - timedelta(days=days)
-        df = df[df["timestamp"] >= cutoff]
-
+        # Filter to last N days: history is in time order, so only the tail after
+        # the cutoff is turned into a frame
+        cutoff_ns = time.time_ns() - days * 86_400 * 10**9
+        start = bisect_left(self._timestamps, cutoff_ns)
+        recent = self.usage_history[start:]
+        if recent:
+            df = pd.DataFrame(recent)
+        else:
+            df = pd.DataFrame(self.usage_history[-1:]).iloc[:0]
+
+        # Local wall-clock datetimes, read straight from the packed column rather than
+        # parsed from the ISO strings; tzlocal applies each row's own UTC offset, so
+        # rows on either side of a DST change convert correctly
+        timestamps_ns = np.frombuffer(self._timestamps, dtype=np.int64)[start:]
+        df["timestamp"] = (
+            pd.to_datetime(pd.Series(timestamps_ns, index=df.index), unit="ns")
+            .dt.tz_localize("UTC")
+            .dt.tz_convert(tzlocal())
+            .dt.tz_localize(None)
+        )
         return df
 
     def estimate_rag_costs(self, num_documents: int, avg_doc_size_kb: float,
                           queries_per_day: int, days: int = 30) -> dict:
         """Estimate costs for a RAG application."""
+        (total_chunks, storage_gb, embedding_cost, query_cost_per_day,
+         storage_cost, read_cost, write_cost) = self._rag_costs(
+            num_documents, avg_doc_size_kb, queries_per_day, days
+        )
+
+        return {
+            "setup_costs": {
+                "embedding_generation": embedding_cost,
+                "initial_storage": write_cost
+            },
+            "monthly_costs": {
+                "queries": query_cost_per_day * days,
+                "storage": storage_cost,
+                "reads": read_cost
+            },
+            "total_monthly": query_cost_per_day * days + (storage_cost + read_cost + write_cost),
+            "details": {
+                "documents": num_documents,
+                "chunks": total_chunks,
+                "queries_per_day": queries_per_day,
+                "storage_gb": round(storage_gb, 3)
+            }
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _rag_costs(num_documents: int, avg_doc_size_kb: float,
+                   queries_per_day: int, days: int) -> tuple:
+        """Pure core of estimate_rag_costs, memoized for repeated estimates."""
         # Estimate embeddings
         avg_chunks_per_doc = max(1, int(avg_doc_size_kb * 1024 / 2000))  # ~2000 chars per chunk
         total_chunks = num_documents * avg_chunks_per_doc
 
         # Embedding costs (one-time)
         embedding_model = "amazon.titan-embed-text-v2:0"
-        embedding_cost = self.calculate_embedding_cost(
-            embedding_model,
-            ["sample"] * total_chunks  # Dummy texts for estimation
-        )
+        # Price total_chunks placeholder texts directly rather than building a
+        # list of dummy strings just to measure it
+        embedding_tokens = total_chunks * (len("sample") >> 2)
+        input_price = AWSCostCalculator._PRICE_PER_TOKEN[embedding_model][0]
+        embedding_cost = embedding_tokens * input_price
 
         # Query costs (recurring)
         llm_model = "anthropic.claude-3-haiku-20240307"
-        query_cost_per_day = self.calculate_llm_cost(
+        query_cost_per_day = AWSCostCalculator._query_cost(
             llm_model,
-            "What is the meaning of life?" * 10,  # ~40 tokens
-            "The meaning of life is..." * 50  # ~200 tokens
-        )['total_cost'] * queries_per_day
+            AWSCostCalculator.SAMPLE_QUERY_CHARS,
+            AWSCostCalculator.SAMPLE_ANSWER_CHARS,
+        ) * queries_per_day
 
         # Storage costs
         storage_gb = (num_documents * avg_doc_size_kb) / (1024 * 1024)
-        storage_cost = self.calculate_storage_cost(
+        storage_cost, read_cost, write_cost = AWSCostCalculator._storage_costs(
             storage_gb,
             queries_per_day * days * 5,  # 5 reads per query
-            total_chunks  # Initial writes
+            total_chunks,  # Initial writes
+            30  # storage is billed per month, whatever the query window
         )
 
-        return {
-            "setup_costs": {
-                "embedding_generation": embedding_cost['total_cost'],
-                "initial_storage": storage_cost['write_cost']
-            },
-            "monthly_costs": {
-                "queries": query_cost_per_day * days,
-                "storage": storage_cost['storage_cost'],
-                "reads": storage_cost['read_cost']
-            },
-            "total_monthly": query_cost_per_day * days + storage_cost['total_cost'],
-            "details": {
-                "documents": num_documents,
-                "chunks": total_chunks,
-                "queries_per_day": queries_per_day,
-                "storage_gb": round(storage_gb, 3)
-            }
-        }
+        return (total_chunks, storage_gb, embedding_cost, query_cost_per_day,
+                storage_cost, read_cost, write_cost)
 
 
 # CLI interface
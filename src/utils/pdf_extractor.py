@@ -1,17 +1,73 @@
 """PDF text extraction utilities."""
 
+import io
 import logging
 import os
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 
+def iter_pdfium_pages(pdf_path: str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    """Yield the raw text of pages [start, stop) using PDFium (requires pypdfium2).
+
+    PDFium is native and several times faster than PyPDF2 or pdfplumber, but its
+    text differs from theirs in spacing and line breaks, so callers opt in to it.
+    """
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        stop = len(pdf) if stop is None else min(stop, len(pdf))
+        for page_num in range(start, stop):
+            page = pdf[page_num]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _extract_page_range(pdf_path: str, backend: str, start: int, stop: int) -> list[str]:
+    """Process-pool worker: labelled texts of pages [start, stop), opened independently."""
+    if backend == "pdfium":
+        texts = enumerate(iter_pdfium_pages(pdf_path, start, stop), start)
+        return [f"--- Page {n + 1} ---\n{text}" for n, text in texts
+                if text and not text.isspace()]
+
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            texts = [(n, pdf.pages[n].extract_text()) for n in range(start, stop)]
+        return [f"--- Page {n + 1} ---\n{text}" for n, text in texts if text]
+
+    import PyPDF2
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        texts = [(n, pdf_reader.pages[n].extract_text()) for n in range(start, stop)]
+    return [f"--- Page {n + 1} ---\n{text}" for n, text in texts
+            if text and not text.isspace()]
+
+
 class PDFExtractor:
-    """Extract text from PDF files for RAG processing."""
+    """Extract text from PDF files for RAG processing.
+
+    Parsed PyPDF2 readers are cached with their files open; call ``close()`` or use
+    the extractor as a context manager to release them.
+    """
+
+    # Parsed PyPDF2 readers kept open at once; each holds an open file handle
+    READER_CACHE_SIZE = 4
 
     def __init__(self):
         self.pypdf2_available = False
         self.pdfplumber_available = False
+        self.pdfium_available = False
 
         # Try to import PDF libraries
         try:
@@ -28,11 +84,84 @@ class PDFExtractor:
         except ImportError:
             logger.warning("pdfplumber not installed. Install with: pip install pdfplumber")
 
-    def extract_text(self, pdf_path: str, max_pages: int | None = None) -> str:
-        """Extract text from PDF file."""
+        # Optional native backend (PDFium), used only when asked for
+        try:
+            import pypdfium2  # noqa: F401
+            self.pdfium_available = True
+        except ImportError:
+            pass
+
+        # Parsed PyPDF2 readers keyed by (path, mtime, size), so page counts and
+        # repeated extractions of an unchanged file skip reparsing the xref table.
+        # Readers parse lazily from their open file rather than an in-memory copy,
+        # so each entry holds that file open until it is evicted or closed
+        self._readers: OrderedDict[tuple, tuple[io.BufferedReader, object]] = OrderedDict()
+
+    def _get_reader(self, pdf_path: str):
+        """Return the cached PyPDF2 reader for a path, reparsing only if the file changed."""
+        stat = os.stat(pdf_path)
+        key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+        entry = self._readers.get(key)
+        if entry is not None:
+            self._readers.move_to_end(key)
+            return entry[1]
+
+        # A reader for an older version of this file is stale; close it now rather
+        # than holding the replaced file open until it ages out of the cache
+        for stale_key in [k for k in self._readers if k[0] == pdf_path]:
+            self._readers.pop(stale_key)[0].close()
+
+        file = open(pdf_path, 'rb')
+        try:
+            reader = self.PyPDF2.PdfReader(file)
+        except Exception:
+            file.close()
+            raise
+        self._readers[key] = (file, reader)
+        while len(self._readers) > self.READER_CACHE_SIZE:
+            _, (evicted_file, _) = self._readers.popitem(last=False)
+            evicted_file.close()
+        return reader
+
+    def close(self):
+        """Drop all cached PDF readers and close their files."""
+        while self._readers:
+            _, (file, _) = self._readers.popitem()
+            file.close()
+
+    def __enter__(self) -> "PDFExtractor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def extract_text(self, pdf_path: str, max_pages: int | None = None,
+                     workers: int = 1, use_pdfium: bool = False) -> str:
+        """Extract text from PDF file.
+
+        With ``workers > 1``, page ranges of long documents are extracted in separate
+        processes; pdfplumber and PyPDF2 are pure Python, so threads would not scale.
+        ``use_pdfium`` extracts with pypdfium2 instead, which is much faster but
+        produces slightly different text (see ``iter_pdfium_pages``).
+        """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
+        if use_pdfium and not self.pdfium_available:
+            raise ImportError("pypdfium2 not installed. Install with: pip install pypdfium2")
+
+        if workers > 1 and (use_pdfium or self.pdfplumber_available
+                            or self.pypdf2_available):
+            num_pages = self.get_page_count(pdf_path)
+            if max_pages:
+                num_pages = min(num_pages, max_pages)
+            # Pool startup and per-worker PDF parsing only pay off on longer documents
+            if num_pages > 4 * workers:
+                return self._extract_parallel(pdf_path, num_pages, workers, use_pdfium)
+
+        if use_pdfium:
+            return self._extract_with_pdfium(pdf_path, max_pages)
+
         # Try pdfplumber first (better extraction)
         if self.pdfplumber_available:
             return self._extract_with_pdfplumber(pdf_path, max_pages)
@@ -43,29 +172,64 @@ class PDFExtractor:
 
         raise ImportError("No PDF extraction library available. Install PyPDF2 or pdfplumber.")
 
+    def _extract_parallel(self, pdf_path: str, num_pages: int, workers: int,
+                          use_pdfium: bool = False) -> str:
+        """Split the pages into contiguous ranges and extract them in a process pool."""
+        if use_pdfium:
+            backend = "pdfium"
+        else:
+            backend = "pdfplumber" if self.pdfplumber_available else "pypdf2"
+        bounds = [num_pages * i // workers for i in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ranges = executor.map(_extract_page_range, [pdf_path] * workers,
+                                  [backend] * workers, bounds[:-1], bounds[1:])
+            # map() returns the ranges in page order
+            return self._join_pages(page for pages in ranges for page in pages)
+
+    @staticmethod
+    def _join_pages(pages: Iterator[str]) -> str:
+        """Join page texts with blank lines, writing each into one buffer as it arrives."""
+        buffer = io.StringIO()
+        for i, page in enumerate(pages):
+            if i:
+                buffer.write("\n\n")
+            buffer.write(page)
+        return buffer.getvalue()
+
+    def _extract_with_pdfium(self, pdf_path: str, max_pages: int | None) -> str:
+        """Extract text using pypdfium2."""
+        return self._join_pages(self._iter_pages_pdfium(pdf_path, max_pages))
+
+    def _iter_pages_pdfium(self, pdf_path: str, max_pages: int | None) -> Iterator[str]:
+        """Yield the labelled text of each non-blank page using PDFium."""
+        for page_num, text in enumerate(iter_pdfium_pages(pdf_path, stop=max_pages or None)):
+            if text and not text.isspace():
+                yield f"--- Page {page_num + 1} ---\n{text}"
+
     def _extract_with_pypdf2(self, pdf_path: str, max_pages: int | None) -> str:
         """Extract text using PyPDF2."""
-        text_content = []
+        return self._join_pages(self._iter_pages_pypdf2(pdf_path, max_pages))
 
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = self.PyPDF2.PdfReader(file)
-            num_pages = len(pdf_reader.pages)
+    def _iter_pages_pypdf2(self, pdf_path: str, max_pages: int | None) -> Iterator[str]:
+        """Yield the labelled text of each non-blank page using PyPDF2."""
+        pdf_reader = self._get_reader(pdf_path)
+        num_pages = len(pdf_reader.pages)
 
-            if max_pages:
-                num_pages = min(num_pages, max_pages)
-
-            for page_num in range(num_pages):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-                if text.strip():
-                    text_content.append(f"--- Page {page_num + 1} ---\n{text}")
+        if max_pages:
+            num_pages = min(num_pages, max_pages)
 
-        return "\n\n".join(text_content)
+        for page_num in range(num_pages):
+            page = pdf_reader.pages[page_num]
+            text = page.extract_text()
+            if text and not text.isspace():
+                yield f"--- Page {page_num + 1} ---\n{text}"
 
     def _extract_with_pdfplumber(self, pdf_path: str, max_pages: int | None) -> str:
         """Extract text using pdfplumber."""
-        text_content = []
+        return self._join_pages(self._iter_pages_pdfplumber(pdf_path, max_pages))
 
+    def _iter_pages_pdfplumber(self, pdf_path: str, max_pages: int | None) -> Iterator[str]:
+        """Yield the labelled text of each non-empty page using pdfplumber."""
         with self.pdfplumber.open(pdf_path) as pdf:
             num_pages = len(pdf.pages)
 
@@ -76,9 +240,7 @@ class PDFExtractor:
                 page = pdf.pages[page_num]
                 text = page.extract_text()
                 if text:
-                    text_content.append(f"--- Page {page_num + 1} ---\n{text}")
-
-        return "\n\n".join(text_content)
+                    yield f"--- Page {page_num + 1} ---\n{text}"
 
     def extract_pages(self, pdf_path: str, start_page: int = 0,
                       end_page: int | None = None) -> list[str]:
@@ -89,19 +251,18 @@ class PDFExtractor:
         pages = []
 
         if self.pypdf2_available:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = self.PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-
-                if end_page is None:
-                    end_page = total_pages
-                else:
-                    end_page = min(end_page, total_pages)
-
-                for page_num in range(start_page, end_page):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    pages.append(text)
+            pdf_reader = self._get_reader(pdf_path)
+            total_pages = len(pdf_reader.pages)
+
+            if end_page is None:
+                end_page = total_pages
+            else:
+                end_page = min(end_page, total_pages)
+
+            for page_num in range(start_page, end_page):
+                page = pdf_reader.pages[page_num]
+                text = page.extract_text()
+                pages.append(text)
         else:
             raise ImportError("PyPDF2 required for page extraction")
 
@@ -113,14 +274,20 @@ class PDFExtractor:
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
         if self.pypdf2_available:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = self.PyPDF2.PdfReader(file)
-                return len(pdf_reader.pages)
+            return len(self._get_reader(pdf_path).pages)
 
         if self.pdfplumber_available:
             with self.pdfplumber.open(pdf_path) as pdf:
                 return len(pdf.pages)
 
+        if self.pdfium_available:
+            import pypdfium2
+            pdf = pypdfium2.PdfDocument(pdf_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+
         raise ImportError("No PDF library available")
 
 
@@ -4,6 +4,7 @@ Compatibility test script for AWS GenAI RAG Workshop
 Tests Level 1 (Python-only) functionality across different OSes
 """
 
+import importlib
 import sys
 import platform
 from pathlib import Path
@@ -11,95 +12,80 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Sample inputs for the functionality checks, built once
+SAMPLE_CHUNK_TEXT = "This is a test. " * 50
+SAMPLE_EMBED_TEXT = "test text"
+
+# (label, module, attribute that must exist or None)
+IMPORT_TESTS = [
+    # RAG modules
+    ("RAG Embeddings", "src.rag.embeddings", "EmbeddingGenerator"),
+    ("RAG Chunking", "src.rag.chunking", "SimpleChunker"),
+    ("Vector Store", "src.rag.vector_store", "FAISSVectorStore"),
+    ("Cost Calculator", "src.utils.cost_calculator", "AWSCostCalculator"),
+    # Third-party dependencies
+    ("Sentence Transformers", "sentence_transformers", None),
+    ("FAISS", "faiss", None),
+    ("Pandas", "pandas", None),
+]
+
 def test_imports():
     """Test that all core Python modules can be imported."""
     print("Testing core imports...")
     
     tests = []
-    
-    # Test RAG modules
-    try:
-        from src.rag.embeddings import EmbeddingGenerator
-        tests.append(("✓", "RAG Embeddings"))
-    except Exception as e:
-        tests.append(("✗", f"RAG Embeddings: {e}"))
-    
-    try:
-        from src.rag.chunking import SimpleChunker
-        tests.append(("✓", "RAG Chunking"))
-    except Exception as e:
-        tests.append(("✗", f"RAG Chunking: {e}"))
-    
-    try:
-        from src.rag.vector_store import FAISSVectorStore
-        tests.append(("✓", "Vector Store"))
-    except Exception as e:
-        tests.append(("✗", f"Vector Store: {e}"))
-    
-    try:
-        from src.utils.cost_calculator import AWSCostCalculator
-        tests.append(("✓", "Cost Calculator"))
-    except Exception as e:
-        tests.append(("✗", f"Cost Calculator: {e}"))
-    
-    # Test third-party dependencies
-    try:
-        import sentence_transformers
-        tests.append(("✓", "Sentence Transformers"))
-    except Exception as e:
-        tests.append(("✗", f"Sentence Transformers: {e}"))
-    
-    try:
-        import faiss
-        tests.append(("✓", "FAISS"))
-    except Exception as e:
-        tests.append(("✗", f"FAISS: {e}"))
-    
-    try:
-        import pandas
-        tests.append(("✓", "Pandas"))
-    except Exception as e:
-        tests.append(("✗", f"Pandas: {e}"))
+    for label, module_name, attribute in IMPORT_TESTS:
+        try:
+            module = importlib.import_module(module_name)
+            if attribute:
+                getattr(module, attribute)
+            tests.append(("✓", label))
+        except Exception as e:
+            tests.append(("✗", f"{label}: {e}"))
     
     return tests
 
+def _check_chunking():
+    """Test text chunking."""
+    from src.rag.chunking import SimpleChunker
+    chunker = SimpleChunker(chunk_size=100, overlap=20)
+    chunks = chunker.chunk_text(SAMPLE_CHUNK_TEXT)
+    return f"{len(chunks)} chunks created"
+
+def _check_cost_estimation():
+    """Test with a simple embedding cost calculation."""
+    from src.utils.cost_calculator import AWSCostCalculator
+    calculator = AWSCostCalculator()
+    cost = calculator.calculate_embedding_cost(
+        "amazon.titan-embed-text-v2:0",
+        [SAMPLE_EMBED_TEXT] * 10
+    )
+    return f"${cost['total_cost']:.6f}"
+
+def _check_embeddings():
+    """Test local embeddings (may download model on first run)."""
+    from src.rag.embeddings import EmbeddingGenerator
+    generator = EmbeddingGenerator()
+    embedding = generator.generate(SAMPLE_EMBED_TEXT)
+    return f"dimension {embedding.shape[1]}"
+
+# (label, check returning a detail string)
+FUNCTIONALITY_TESTS = [
+    ("Text chunking", _check_chunking),
+    ("Cost estimation", _check_cost_estimation),
+    ("Embeddings", _check_embeddings),
+]
+
 def test_basic_functionality():
     """Test basic RAG functionality without external dependencies."""
     print("\nTesting basic functionality...")
     
     tests = []
-    
-    # Test text chunking
-    try:
-        from src.rag.chunking import SimpleChunker
-        chunker = SimpleChunker(chunk_size=100, overlap=20)
-        sample_text = "This is a test. " * 50
-        chunks = chunker.chunk_text(sample_text)
-        tests.append(("✓", f"Text chunking: {len(chunks)} chunks created"))
-    except Exception as e:
-        tests.append(("✗", f"Text chunking: {e}"))
-    
-    # Test cost calculation
-    try:
-        from src.utils.cost_calculator import AWSCostCalculator
-        calculator = AWSCostCalculator()
-        # Test with a simple embedding cost calculation
-        cost = calculator.calculate_embedding_cost(
-            "amazon.titan-embed-text-v2:0",
-            ["test text"] * 10
-        )
-        tests.append(("✓", f"Cost estimation: ${cost['total_cost']:.6f}"))
-    except Exception as e:
-        tests.append(("✗", f"Cost estimation: {e}"))
-    
-    # Test local embeddings (may download model on first run)
-    try:
-        from src.rag.embeddings import EmbeddingGenerator
-        generator = EmbeddingGenerator()
-        embedding = generator.generate("test text")
-        tests.append(("✓", f"Embeddings: dimension {embedding.shape[1]}"))
-    except Exception as e:
-        tests.append(("✗", f"Embeddings: {e}"))
+    for label, check in FUNCTIONALITY_TESTS:
+        try:
+            tests.append(("✓", f"{label}: {check()}"))
+        except Exception as e:
+            tests.append(("✗", f"{label}: {e}"))
     
     return tests
 
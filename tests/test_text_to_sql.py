@@ -5,7 +5,9 @@ Test suite for Text-to-SQL functionality
 import os
 import sys
 import unittest
-from unittest.mock import Mock, patch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock, Mock, patch
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -24,6 +26,11 @@ class TestSQLSecurityValidator(unittest.TestCase):
     def setUp(self):
         self.validator = SQLSecurityValidator()
 
+    def _validate_batch(self, queries):
+        """Validate queries concurrently; this also exercises the shared validator cache."""
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            return list(executor.map(self.validator.validate_query, queries))
+
     def test_valid_select_query(self):
         """Test that valid SELECT queries pass validation."""
         valid_queries = [
@@ -33,10 +40,11 @@ class TestSQLSecurityValidator(unittest.TestCase):
             "SELECT c.name, o.total FROM customers c JOIN orders o ON c.id = o.customer_id",
         ]
 
-        for query in valid_queries:
-            is_valid, error = self.validator.validate_query(query)
-            self.assertTrue(is_valid, f"Query should be valid: {query}")
-            self.assertIsNone(error)
+        results = self._validate_batch(valid_queries)
+        for query, (is_valid, error) in zip(valid_queries, results):
+            with self.subTest(query=query):
+                self.assertTrue(is_valid, f"Query should be valid: {query}")
+                self.assertIsNone(error)
 
     def test_dangerous_queries_blocked(self):
         """Test that dangerous queries are blocked."""
@@ -51,10 +59,11 @@ class TestSQLSecurityValidator(unittest.TestCase):
             "REVOKE ALL ON customers FROM user",
         ]
 
-        for query in dangerous_queries:
-            is_valid, error = self.validator.validate_query(query)
-            self.assertFalse(is_valid, f"Query should be blocked: {query}")
-            self.assertIsNotNone(error)
+        results = self._validate_batch(dangerous_queries)
+        for query, (is_valid, error) in zip(dangerous_queries, results):
+            with self.subTest(query=query):
+                self.assertFalse(is_valid, f"Query should be blocked: {query}")
+                self.assertIsNotNone(error)
 
     def test_complex_queries_with_limits(self):
         """Test that overly complex queries are blocked."""
@@ -83,6 +92,24 @@ class TestSQLSecurityValidator(unittest.TestCase):
             is_valid, error = self.validator.validate_query(query)
             self.assertFalse(is_valid, f"Injection query should be blocked: {query}")
 
+    def test_trivial_select_with_keyword_names_blocked(self):
+        """Test that the trivial-SELECT fast path still blocks dangerous keywords."""
+        for query in ["SELECT drop FROM customers", "SELECT * FROM delete"]:
+            with self.subTest(query=query):
+                is_valid, error = self.validator.validate_query(query)
+                self.assertFalse(is_valid)
+                self.assertIsNotNone(error)
+
+    def test_control_characters_blocked(self):
+        """Test that control characters are blocked but ordinary whitespace is not."""
+        is_valid, error = self.validator.validate_query("SELECT * FROM customers\x00")
+        self.assertFalse(is_valid)
+        self.assertIsNotNone(error)
+
+        is_valid, error = self.validator.validate_query("SELECT *\n\tFROM customers\r\n")
+        self.assertTrue(is_valid)
+        self.assertIsNone(error)
+
 
 class TestDatabaseIntrospector(unittest.TestCase):
     """Test the database introspector."""
@@ -98,32 +125,29 @@ class TestDatabaseIntrospector(unittest.TestCase):
         }
         self.introspector = DatabaseIntrospector(self.mock_params)
 
-    @patch("agents.sql_agent.psycopg2.connect")
-    def test_schema_extraction(self, mock_connect):
+    @patch("agents.sql_agent._get_pool")
+    def test_schema_extraction(self, mock_get_pool):
         """Test schema information extraction."""
-        # Mock database connection and cursor
-        mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_connect.return_value.__enter__.return_value = mock_conn
+        # Mock pooled database connection and cursor
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_get_pool.return_value.getconn.return_value.__enter__.return_value = mock_conn
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
 
-        # Mock table list query
+        # Mock table list, schema-wide columns and schema-wide foreign key queries
         mock_cursor.fetchall.side_effect = [
             [("customers",), ("orders",)],  # Tables
-            # Customers table columns
             [
-                ("customer_id", "integer", "NO", None, None),
-                ("first_name", "character varying", "NO", None, 50),
-                ("email", "character varying", "NO", None, 100),
+                # Customers table columns
+                ("customers", "customer_id", "integer", "NO", None, None),
+                ("customers", "first_name", "character varying", "NO", None, 50),
+                ("customers", "email", "character varying", "NO", None, 100),
+                # Orders table columns
+                ("orders", "order_id", "integer", "NO", None, None),
+                ("orders", "customer_id", "integer", "NO", None, None),
+                ("orders", "total_amount", "numeric", "NO", None, None),
             ],
-            [],  # No foreign keys for customers
-            # Orders table columns
-            [
-                ("order_id", "integer", "NO", None, None),
-                ("customer_id", "integer", "NO", None, None),
-                ("total_amount", "numeric", "NO", None, None),
-            ],
-            [("customer_id", "customers", "customer_id")],  # Foreign key for orders
+            [("orders", "customer_id", "customers", "customer_id")],  # Foreign key for orders
         ]
 
         schema_info = self.introspector.get_schema_info("test_schema")
@@ -145,6 +169,9 @@ class TestDatabaseIntrospector(unittest.TestCase):
         self.assertEqual(len(orders_table.columns), 3)
         self.assertEqual(len(orders_table.foreign_keys), 1)
 
+        # Three round trips regardless of table count
+        self.assertEqual(mock_cursor.execute.call_count, 3)
+
 
 class TestSQLAgent(unittest.TestCase):
     """Test the main SQL Agent class."""
@@ -171,18 +198,21 @@ class TestSQLAgent(unittest.TestCase):
         self.assertIsNotNone(agent.validator)
         self.assertIsNone(agent.schema_cache)
 
-    @patch("agents.sql_agent.psycopg2.connect")
-    def test_query_execution_success(self, mock_connect):
+    @patch("agents.sql_agent._get_pool")
+    def test_query_execution_success(self, mock_get_pool):
         """Test successful query execution."""
-        # Mock database components
-        mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_connect.return_value.__enter__.return_value = mock_conn
+        # Mock pooled database components
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_get_pool.return_value.getconn.return_value.__enter__.return_value = mock_conn
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
 
-        # Mock query results
-        mock_cursor.description = [("count",), ("name",)]
-        mock_cursor.fetchall.return_value = [(10, "test")]
+        # Mock query results (name, type_code) and RealDictCursor rows
+        mock_cursor.description = [("count", 20), ("name", 25), ("created_at", 1114)]
+        mock_cursor.fetchmany.side_effect = [
+            [{"count": 10, "name": "test", "created_at": datetime(2024, 11, 1, 12, 30)}],
+            [],
+        ]
 
         # Create agent with mocked components
         with (
@@ -208,12 +238,13 @@ class TestSQLAgent(unittest.TestCase):
             self.assertIsNotNone(result.data)
             self.assertEqual(len(result.data), 1)
             self.assertEqual(result.data[0]["count"], 10)
+            self.assertEqual(result.data[0]["created_at"], "2024-11-01T12:30:00")
 
-    @patch("agents.sql_agent.psycopg2.connect")
-    def test_query_execution_failure(self, mock_connect):
+    @patch("agents.sql_agent._get_pool")
+    def test_query_execution_failure(self, mock_get_pool):
         """Test query execution failure handling."""
         # Mock database error
-        mock_connect.side_effect = Exception("Database connection failed")
+        mock_get_pool.return_value.getconn.side_effect = Exception("Database connection failed")
 
         with (
             patch("agents.sql_agent.DatabaseIntrospector"),
@@ -233,15 +264,17 @@ class TestSQLAgent(unittest.TestCase):
 class TestTextToSQLDemo(unittest.TestCase):
     """Test the Text-to-SQL demo class."""
 
-    def setUp(self):
-        self.mock_db_params = {
+    @classmethod
+    def setUpClass(cls):
+        # The demo is only read by these tests, so one instance serves them all
+        cls.mock_db_params = {
             "host": "localhost",
             "port": 5432,
             "database": "test_db",
             "user": "test_user",
             "password": "test_pass",
         }
-        self.demo = TextToSQLDemo(self.mock_db_params)
+        cls.demo = TextToSQLDemo(cls.mock_db_params)
 
     def test_demo_initialization(self):
         """Test demo class initialization."""
@@ -276,7 +309,7 @@ class TestTextToSQLDemo(unittest.TestCase):
         self.assertIn("email: john.doe@example.com", formatted)
 
         # Long text should be truncated
-        self.assertIn("long_description: This is a very long descri...", formatted)
+        self.assertIn("long_description: This is a very long descrip...", formatted)
 
 
 class TestIntegration(unittest.TestCase):